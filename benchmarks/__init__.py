@@ -0,0 +1,60 @@
+"""
+Micro benchmarks. Run them from the project root, e.g.:
+
+    python -m benchmarks.login_hashing
+"""
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Run the benchmark against a throwaway copy of the configured database."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def report(name: str, samples: list[float], elapsed: float, **extra):
+    """Print one line of results. Samples are latencies in seconds."""
+    line = (
+        f"{name:<32} n={len(samples):<7} {len(samples) / elapsed:>10.1f} ops/s  "
+        f"mean={statistics.fmean(samples) * 1000 if samples else 0:.3f}ms  "
+        f"p99={percentile(samples, 99) * 1000:.3f}ms"
+    )
+    for key, value in extra.items():
+        line += f"  {key}={value}"
+    print(line)
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
@@ -0,0 +1,73 @@
+"""
+Compare per-request latency of API endpoints served through the full
+middleware stack with the API middleware stack of APIWSGIHandler.
+
+Needs the database from appconfig.env, a test database is created for the run.
+
+    python -m benchmarks.api_middleware --requests 2000
+"""
+import argparse
+
+from benchmarks import Timer, report, setup, test_database
+
+
+def run_requests(handler, make_request, requests: int):
+    latencies = []
+    with Timer() as timer:
+        for _ in range(requests):
+            request = make_request()
+            with Timer() as request_timer:
+                response = handler.get_response(request)
+            latencies.append(request_timer.elapsed)
+            assert response.status_code == 200, response.content
+    return latencies, timer.elapsed
+
+
+def run(args):
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import RequestFactory
+    from django.urls import reverse
+
+    from simple_django.accounts.models import User
+    from simple_django.core.handlers import APIWSGIHandler
+
+    # Skip the signals, there's no need for a verification email.
+    (user,) = User.objects.bulk_create(
+        [User(username="benchmark", email="benchmark@example.com")]
+    )
+    tokens = user.get_auth_tokens()
+    rf = RequestFactory()
+
+    endpoints = {
+        "refresh-token": lambda: rf.post(
+            reverse("api:accounts:refresh-token"),
+            {"refresh": tokens["refresh"]},
+            content_type="application/json",
+        ),
+        "user": lambda: rf.get(
+            reverse("api:accounts:user"),
+            HTTP_AUTHORIZATION=f"Bearer {tokens['access']}",
+        ),
+    }
+    handlers = {"full middleware": WSGIHandler(), "api middleware": APIWSGIHandler()}
+    for endpoint, make_request in endpoints.items():
+        for name, handler in handlers.items():
+            # Warm up caches and connections.
+            run_requests(handler, make_request, 10)
+            latencies, elapsed = run_requests(handler, make_request, args.requests)
+            report(f"{name} {endpoint}", latencies, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    setup()
+
+    with test_database():
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Compare the throughput of the sync authentication views with their async
+versions when served through Django's ASGI handler.
+
+Sync views are run by the ASGI handler with sync_to_async, one at a time on a
+single thread, while async views run on the event loop.
+
+Needs the database from appconfig.env, a test database is created for the run.
+
+    python -m benchmarks.asgi_auth --concurrency 50 --requests 1000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks import Timer, report, setup, test_database
+
+PASSWORD = "correct horse battery staple"
+
+
+async def run_requests(client, url, data, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def request():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(url, data, content_type="application/json")
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.content
+
+    with Timer() as timer:
+        await asyncio.gather(*(request() for _ in range(requests)))
+    return latencies, timer.elapsed
+
+
+async def run(args):
+    from django.test import AsyncClient
+
+    from simple_django.accounts.models import User
+
+    user = User(username="benchmark", email="benchmark@example.com")
+    user.set_password(PASSWORD)
+    # Skip the signals, there's no need for a verification email.
+    (user,) = await User.objects.abulk_create([user])
+    tokens = await user.aget_auth_tokens()
+
+    client = AsyncClient()
+    endpoints = {
+        "login": {"email": user.email, "password": PASSWORD},
+        "refresh-token": {"refresh": tokens["refresh"]},
+    }
+    for endpoint, data in endpoints.items():
+        for mode in ("sync", "async"):
+            latencies, elapsed = await run_requests(
+                client, f"/{mode}/{endpoint}/", data, args.requests, args.concurrency
+            )
+            report(f"{mode} {endpoint}", latencies, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.test import override_settings
+
+    with test_database(), override_settings(ROOT_URLCONF="benchmarks.urls"):
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
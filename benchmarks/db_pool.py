@@ -0,0 +1,96 @@
+"""
+Compare connection latency of threads that each connect, run a query and
+close the connection, as a request does with CONN_MAX_AGE = 0, with and
+without the connection pool.
+
+Needs the database from appconfig.env, a test database is created for the run.
+
+    python -m benchmarks.db_pool --threads 16 --requests 200
+"""
+import argparse
+import threading
+
+from benchmarks import Timer, report, setup, test_database
+
+
+def count_connections(connection) -> int:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()"
+        )
+        return cursor.fetchone()[0]
+
+
+def run_threads(make_connection, threads: int, requests: int):
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        connection = make_connection()
+        samples = []
+        barrier.wait()
+        for _ in range(requests):
+            with Timer() as timer:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                connection.close()
+            samples.append(timer.elapsed)
+        with lock:
+            latencies.extend(samples)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    with Timer() as timer:
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+    return latencies, timer.elapsed
+
+
+def run(args):
+    from django.db import connection
+    from django.db.utils import load_backend
+
+    from simple_django.core.db import pool
+
+    settings_dict = connection.settings_dict
+    backends = {
+        "new connections": (
+            "django.db.backends.postgresql",
+            {key: value for key, value in settings_dict.items() if key != "POOL"},
+        ),
+        "pooled connections": (
+            "simple_django.core.db.backends.postgresql",
+            {
+                **settings_dict,
+                "POOL": {**settings_dict.get("POOL", {}), "MAX_SIZE": args.pool_size},
+            },
+        ),
+    }
+    for name, (engine, backend_settings) in backends.items():
+        backend = load_backend(engine)
+
+        def make_connection():
+            return backend.DatabaseWrapper(backend_settings, "benchmark")
+
+        latencies, elapsed = run_threads(make_connection, args.threads, args.requests)
+        report(name, latencies, elapsed, open_connections=count_connections(connection))
+        pool.close_pools(settings_dict["NAME"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--pool-size", type=int, default=8)
+    args = parser.parse_args()
+
+    setup()
+
+    with test_database():
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Compare logins per second with password hashing on the request thread against
+hashing on the bounded hashing pool.
+
+Request workers are simulated with threads, as with gunicorn's gthread worker.
+
+    python -m benchmarks.login_hashing --threads 32 --duration 10
+"""
+import argparse
+import threading
+import time
+
+from benchmarks import Timer, report, setup
+
+
+def run_logins(user, password, threads: int, duration: float):
+    from simple_django.accounts import hashing
+
+    latencies = []
+    rejected = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        nonlocal rejected
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                hashing.check_password(user, password)
+            except hashing.PasswordHashingUnavailable:
+                with lock:
+                    rejected += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    with Timer() as timer:
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+
+    hashing.shutdown()
+    return latencies, rejected, timer.elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--hasher", default="Argon2PasswordHasher")
+    args = parser.parse_args()
+
+    setup()
+
+    from django.test import override_settings
+
+    from simple_django.accounts import hashing
+    from simple_django.accounts.models import User
+
+    password = "correct horse battery staple"
+    hashers = [f"django.contrib.auth.hashers.{args.hasher}"]
+
+    with override_settings(PASSWORD_HASHERS=hashers):
+        user = User(username="benchmark")
+        user.set_password(password)
+
+        with override_settings(PASSWORD_HASHING_WORKERS=0):
+            latencies, rejected, elapsed = run_logins(
+                user, password, args.threads, args.duration
+            )
+        report("request thread", latencies, elapsed, rejected=rejected)
+
+        hashing.shutdown()
+        latencies, rejected, elapsed = run_logins(
+            user, password, args.threads, args.duration
+        )
+        report("hashing pool", latencies, elapsed, rejected=rejected)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Compare fetching pages of the users list endpoint with DRF's
+LimitOffsetPagination, which also counts the rows, and with keyset pagination,
+near the start of the list and deep into it.
+
+Needs the database from appconfig.env, a test database is created for the run
+and filled with enough users for the deepest page.
+
+    python -m benchmarks.pagination --page 10000 --page-size 50
+"""
+import argparse
+
+from benchmarks import Timer, report, setup, test_database
+
+CREATE_USERS = """
+INSERT INTO users (
+    username, email, password, first_name, last_name, is_superuser, is_staff,
+    is_active, date_joined, primary_email_verified
+)
+SELECT 'user' || i, 'user' || i || '@example.com', '', '', '', false, false,
+    true, now() - i * interval '1 second', false
+FROM generate_series(1, %s) AS i
+"""
+
+
+def create_users(count: int):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        # primary_email_verified is false without email addresses anyway.
+        cursor.execute("ALTER TABLE users DISABLE TRIGGER USER")
+        cursor.execute(CREATE_USERS, [count])
+        cursor.execute("ALTER TABLE users ENABLE TRIGGER USER")
+        cursor.execute("ANALYZE users")
+
+
+def run_requests(view, admin, url: str, requests: int):
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    rf = APIRequestFactory()
+    latencies = []
+    with Timer() as timer:
+        for _ in range(requests):
+            request = rf.get(url)
+            force_authenticate(request, admin)
+            with Timer() as request_timer:
+                response = view(request)
+                response.render()
+            latencies.append(request_timer.elapsed)
+            assert response.status_code == 200, response.content
+            assert len(response.data["results"]) > 0
+    return latencies, timer.elapsed
+
+
+def get_cursor_url(url: str, page: int, page_size: int) -> str:
+    """Return the URL of a page as the keyset paginator would link it."""
+    from simple_django.accounts.models import User
+    from simple_django.core.pagination import KeysetPagination
+
+    paginator = KeysetPagination()
+    paginator.base_url = url
+    paginator.fields = [User._meta.get_field("date_joined"), User._meta.pk]
+    last_of_previous_page = User.objects.order_by("-date_joined", "-id")[
+        (page - 1) * page_size - 1
+    ]
+    return paginator.encode_cursor(last_of_previous_page, reverse=False)
+
+
+def run(args):
+    from django.urls import reverse
+    from rest_framework.pagination import LimitOffsetPagination
+
+    from simple_django.accounts.api.views import UserListAPIView
+    from simple_django.accounts.models import User
+
+    create_users(args.page * args.page_size)
+    admin = User.objects.create(username="admin", is_staff=True)
+
+    url = f"http://testserver{reverse('api:accounts:users')}"
+    offset_view = UserListAPIView.as_view(pagination_class=LimitOffsetPagination)
+    keyset_view = UserListAPIView.as_view()
+
+    for page in (2, args.page):
+        offset = (page - 1) * args.page_size
+        offset_url = f"{url}?limit={args.page_size}&offset={offset}"
+        keyset_url = get_cursor_url(
+            f"{url}?page_size={args.page_size}", page, args.page_size
+        )
+        for name, view, page_url in [
+            ("offset", offset_view, offset_url),
+            ("keyset", keyset_view, keyset_url),
+        ]:
+            # Warm up caches and connections.
+            run_requests(view, admin, page_url, 5)
+            latencies, elapsed = run_requests(view, admin, page_url, args.requests)
+            report(f"{name} page {page}", latencies, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--page", type=int, default=10000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    setup()
+
+    with test_database():
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Measure the overhead of the authentication throttles per request against the
+configured cache, compared to DRF's AnonRateThrottle which reads and writes
+back the whole request history.
+
+    python -m benchmarks.throttling --requests 10000
+"""
+import argparse
+
+from benchmarks import Timer, report, setup
+
+
+def run_requests(throttle_class, requests: int):
+    from django.core.cache import cache
+    from django.test import RequestFactory
+    from rest_framework.parsers import JSONParser
+    from rest_framework.request import Request
+
+    cache.clear()
+    rf = RequestFactory()
+    latencies = []
+    throttled = 0
+    with Timer() as timer:
+        for i in range(requests):
+            request = Request(
+                rf.post(
+                    "/",
+                    {"email": f"user{i % 100}@example.com"},
+                    content_type="application/json",
+                ),
+                parsers=[JSONParser()],
+            )
+            with Timer() as request_timer:
+                if not throttle_class().allow_request(request, None):
+                    throttled += 1
+            latencies.append(request_timer.elapsed)
+    return latencies, throttled, timer.elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=10000)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.test import override_settings
+    from rest_framework.throttling import AnonRateThrottle
+
+    from simple_django.accounts.api.throttling import (
+        AuthEmailRateThrottle,
+        AuthIPRateThrottle,
+    )
+
+    rates = {"anon": "1000/min", "auth_ip": "1000/min", "auth_email": "1000/min"}
+    with override_settings(REST_FRAMEWORK={"DEFAULT_THROTTLE_RATES": rates}):
+        AnonRateThrottle.THROTTLE_RATES = rates
+        for throttle_class in (
+            AnonRateThrottle,
+            AuthIPRateThrottle,
+            AuthEmailRateThrottle,
+        ):
+            latencies, throttled, elapsed = run_requests(throttle_class, args.requests)
+            report(throttle_class.__name__, latencies, elapsed, throttled=throttled)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from simple_django.accounts.api import async_views, views
+
+urlpatterns = [
+    path("sync/login/", views.login_with_email_password),
+    path("sync/refresh-token/", views.refresh_access_token),
+    path("async/login/", async_views.login_with_email_password),
+    path("async/refresh-token/", async_views.refresh_access_token),
+]
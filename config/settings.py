@@ -1,3 +1,4 @@
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -23,6 +24,9 @@ DEBUG = env.bool("DJANGO_DEBUG", False)
 
 TEST = env.bool("DJANGO_TEST", False)
 
+# Skips the tests tagged slow, run them with `python manage.py test --tag slow`.
+TEST_RUNNER = "simple_django.core.runner.DiscoverRunner"
+
 PROJECT_NAME = "Simple Django"
 
 DOMAIN_NAME = "example.com"
@@ -61,7 +65,7 @@ LOCALE_PATHS = [
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "simple_django.core.db.backends.postgresql",
         "NAME": env.str("POSTGRES_DB"),
         "USER": env.str("POSTGRES_USER"),
         "PASSWORD": env.str("POSTGRES_PASSWORD"),
@@ -71,9 +75,47 @@ DATABASES = {
     }
 }
 
-if not DEBUG:
+if env.bool("DJANGO_DB_POOL", True):
+    # Connections go back to the pool at the end of each request, so
+    # CONN_MAX_AGE must stay at 0.
+    DATABASES["default"]["POOL"] = {
+        "MIN_SIZE": env.int("DJANGO_DB_POOL_MIN_SIZE", 2),
+        "MAX_SIZE": env.int("DJANGO_DB_POOL_MAX_SIZE", 20),
+        "TIMEOUT": env.float("DJANGO_DB_POOL_TIMEOUT", 5),
+        "MAX_IDLE": env.float("DJANGO_DB_POOL_MAX_IDLE", 300),
+        "CHECK_AFTER": env.float("DJANGO_DB_POOL_CHECK_AFTER", 30),
+    }
+elif not DEBUG:
     DATABASES["default"]["CONN_MAX_AGE"] = env.int("DJANGO_DB_CONN_MAX_AGE", 60)
 
+# Read replicas, as host[:port][/name] with the rest of the settings taken
+# from the primary. Reads of safe requests and read-only tasks go to them, see
+# simple_django.core.db.routers.
+DATABASE_REPLICAS = []
+for i, replica in enumerate(env.list("DJANGO_DB_REPLICAS", default=[])):
+    address, _, name = replica.partition("/")
+    host, _, port = address.partition(":")
+    alias = f"replica_{i}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "NAME": name or DATABASES["default"]["NAME"],
+        "ATOMIC_REQUESTS": False,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["simple_django.core.db.routers.ReplicaRouter"]
+
+# Replicas further behind the primary than this many seconds aren't read from.
+REPLICA_MAX_LAG = env.float("DJANGO_DB_REPLICA_MAX_LAG", 2)
+REPLICA_LAG_CHECK_INTERVAL = env.float("DJANGO_DB_REPLICA_LAG_CHECK_INTERVAL", 5)
+
+# How long a client reads from the primary after a request that wrote.
+REPLICA_PIN_COOKIE_NAME = "primary_pin"
+REPLICA_PIN_TIMEOUT = env.int("DJANGO_DB_REPLICA_PIN_TIMEOUT", 5)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -134,12 +176,35 @@ if DEBUG or TEST:
 else:
     PASSWORD_HASHERS = [
         # https://docs.djangoproject.com/en/3.2/topics/auth/passwords/#using-argon2-with-django
-        "django.contrib.auth.hashers.Argon2PasswordHasher",
-        "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
-        "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+        # Parameters are tuned per host with `manage.py calibrate_password_hashers`.
+        "simple_django.accounts.hashers.CalibratedArgon2PasswordHasher",
+        "simple_django.accounts.hashers.CalibratedBCryptSHA256PasswordHasher",
+        "simple_django.accounts.hashers.CalibratedPBKDF2PasswordHasher",
         "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
     ]
 
+# Written by `manage.py calibrate_password_hashers`.
+PASSWORD_HASHERS_PARAMETERS_FILE = Path(
+    env.str(
+        "DJANGO_PASSWORD_HASHERS_PARAMETERS_FILE",
+        str(BASE_DIR / "password_hashers.json"),
+    )
+)
+
+# Password hashing runs on a bounded pool of threads so that a burst of logins
+# can't pin every request worker on the CPU. Argon2 and BCrypt release the GIL
+# while hashing. Set the number of workers to 0 to hash on the request thread.
+PASSWORD_HASHING_WORKERS = env.int(
+    "DJANGO_PASSWORD_HASHING_WORKERS", os.cpu_count() or 1
+)
+
+# Hashing jobs allowed to wait for a free worker before requests are rejected
+# with a 503.
+PASSWORD_HASHING_QUEUE_SIZE = env.int("DJANGO_PASSWORD_HASHING_QUEUE_SIZE", 16)
+
+# Seconds sent in the Retry-After header when the hashing queue is full.
+PASSWORD_HASHING_RETRY_AFTER = env.int("DJANGO_PASSWORD_HASHING_RETRY_AFTER", 1)
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -164,6 +229,7 @@ AUTH_PASSWORD_VALIDATORS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "simple_django.core.db.middleware.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -173,6 +239,18 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Middleware for requests under API_PATH_PREFIX, used instead of MIDDLEWARE by
+# the handlers in simple_django.core.handlers. API views authenticate with
+# JWTs and are exempt from CSRF checks, so they don't need sessions, CSRF,
+# messages, static files, locale or clickjacking middleware.
+API_MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    "simple_django.core.db.middleware.ReplicaRoutingMiddleware",
+    "django.middleware.common.CommonMiddleware",
+]
+
+API_PATH_PREFIX = "/api/"
+
 # STATIC
 # ------------------------------------------------------------------------------
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
@@ -382,11 +460,66 @@ if not DEBUG:
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/3.2/ref/settings/#caches
 
+# The default cache keeps recently used entries in each process in front of
+# memcached, see simple_django.core.cache.tiered.
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
-        "LOCATION": env.str("DJANGO_MEMCACHE_LOCATION"),
-    }
+        "BACKEND": "simple_django.core.cache.tiered.TieredCache",
+        "LOCATION": "default",
+        "OPTIONS": {
+            "REMOTE": "memcached",
+            "MAX_ENTRIES": env.int("DJANGO_CACHE_L1_MAX_ENTRIES", 10000),
+            "L1_TIMEOUT": env.int("DJANGO_CACHE_L1_TIMEOUT", 60),
+            # Throttle counters and the last_login buffer are written far
+            # more often than read, so they skip the local store.
+            "BYPASS_PREFIXES": ["throttle_", "last_login_buffer_"],
+        },
+    },
+    # Falls back to a per-process cache while memcached is failing, see
+    # simple_django.core.cache.breaker.
+    "memcached": {
+        "BACKEND": "simple_django.core.cache.breaker.CircuitBreakerCache",
+        "LOCATION": "memcached",
+        "OPTIONS": {
+            "PRIMARY": "memcached_nodes",
+            "FALLBACK": "local",
+            "FAILURE_THRESHOLD": env.int("DJANGO_CACHE_FAILURE_THRESHOLD", 3),
+            "PROBE_INTERVAL": env.float("DJANGO_CACHE_PROBE_INTERVAL", 5),
+        },
+    },
+    # DJANGO_MEMCACHE_LOCATION is a comma separated list of nodes, see
+    # simple_django.core.cache.memcached. max_pool_size is per node and should
+    # be at least the number of threads per process.
+    "memcached_nodes": {
+        "BACKEND": "simple_django.core.cache.memcached.PooledPyMemcacheCache",
+        "LOCATION": env.list("DJANGO_MEMCACHE_LOCATION"),
+        "OPTIONS": {
+            "max_pool_size": env.int("DJANGO_MEMCACHE_MAX_POOL_SIZE", 16),
+            "pool_idle_timeout": 60,
+            "connect_timeout": env.float("DJANGO_MEMCACHE_CONNECT_TIMEOUT", 0.5),
+            "timeout": env.float("DJANGO_MEMCACHE_TIMEOUT", 0.5),
+            "retry_attempts": env.int("DJANGO_MEMCACHE_RETRY_ATTEMPTS", 2),
+            "retry_timeout": 1,
+            "dead_timeout": env.int("DJANGO_MEMCACHE_DEAD_TIMEOUT", 30),
+        },
+    },
+    "local": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "local",
+    },
+}
+
+# CELERY
+# ------------------------------------------------------------------------------
+CELERY_BEAT_SCHEDULE = {
+    "flush-last-login-buffer": {
+        "task": "simple_django.accounts.tasks.flush_last_login_buffer",
+        "schedule": 60,
+    },
+    "dispatch-email-outbox": {
+        "task": "simple_django.accounts.tasks.dispatch_email_outbox",
+        "schedule": env.float("DJANGO_EMAIL_OUTBOX_DISPATCH_INTERVAL", 5),
+    },
 }
 
 # django.contrib.messages
@@ -412,11 +545,41 @@ SHELL_PLUS_PRINT_SQL = True
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.BasicAuthentication",
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    )
+        "simple_django.accounts.api.authentication.CachedBasicAuthentication",
+        "simple_django.accounts.api.authentication.CachedJWTAuthentication",
+    ),
+    # List endpoints page with keysets on their ordering, which needs a
+    # matching index.
+    "DEFAULT_PAGINATION_CLASS": "simple_django.core.pagination.KeysetPagination",
+    "PAGE_SIZE": env.int("DJANGO_API_PAGE_SIZE", 50),
+    # Number of proxies in front of the app, throttles identify clients by the
+    # address they appended to X-Forwarded-For. With 0 the header is ignored.
+    "NUM_PROXIES": env.int("DJANGO_NUM_PROXIES", 0),
+    "DEFAULT_THROTTLE_RATES": {
+        "auth_ip": env.str("DJANGO_THROTTLE_RATE_AUTH_IP", "30/min"),
+        "auth_email": env.str("DJANGO_THROTTLE_RATE_AUTH_EMAIL", "10/min"),
+        "email_verification_user": env.str(
+            "DJANGO_THROTTLE_RATE_EMAIL_VERIFICATION_USER", "10/min"
+        ),
+    },
 }
 
+# EstimatedCountPaginator, used by the admin, shows planner estimates for
+# querysets of at least this many rows and caches smaller counts for
+# PAGINATOR_COUNT_CACHE_TIMEOUT seconds.
+PAGINATOR_ESTIMATE_THRESHOLD = env.int("DJANGO_PAGINATOR_ESTIMATE_THRESHOLD", 100_000)
+PAGINATOR_COUNT_CACHE_TIMEOUT = env.int("DJANGO_PAGINATOR_COUNT_CACHE_TIMEOUT", 300)
+
+# How long users authenticated with a JWT are kept in the cache, in seconds.
+JWT_USER_CACHE_TIMEOUT = env.int("DJANGO_JWT_USER_CACHE_TIMEOUT", 300)
+
+# How long credentials checked by CachedBasicAuthentication are remembered, in
+# seconds.
+BASIC_AUTH_CACHE_TIMEOUT = env.int("DJANGO_BASIC_AUTH_CACHE_TIMEOUT", 60)
+
+# Bump to drop every cached user, e.g. after adding fields to the user model.
+JWT_USER_CACHE_VERSION = 2
+
 EMAIL_CONFIRMATION_URL = env.str("DJANGO_EMAIL_CONFIRMATION_URL")
 
 REFRESH_TOKEN_COOKIE_NAME = "refresh_token"
@@ -431,3 +594,49 @@ CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_HEADERS = (*default_headers, "baggage", "sentry-trace")
 
 EMAIL_VERIFICATION_EXPIRY = timedelta(minutes=15)
+
+# How email verification codes are checked. "signed" codes carry the address
+# id and expiry and are checked against SECRET_KEY, "cache" codes are random
+# strings stored in the cache until they're used or expire.
+EMAIL_VERIFICATION_CODE_MODE = env.str("DJANGO_EMAIL_VERIFICATION_CODE_MODE", "signed")
+
+# Verification emails sent per batch by the dispatch_email_outbox task.
+EMAIL_OUTBOX_BATCH_SIZE = env.int("DJANGO_EMAIL_OUTBOX_BATCH_SIZE", 100)
+
+# Failed batches are retried after EMAIL_OUTBOX_RETRY_DELAY, doubled on every
+# attempt up to EMAIL_OUTBOX_MAX_RETRY_DELAY, and given up on after
+# EMAIL_OUTBOX_MAX_ATTEMPTS.
+EMAIL_OUTBOX_RETRY_DELAY = timedelta(seconds=30)
+EMAIL_OUTBOX_MAX_RETRY_DELAY = timedelta(hours=1)
+EMAIL_OUTBOX_MAX_ATTEMPTS = env.int("DJANGO_EMAIL_OUTBOX_MAX_ATTEMPTS", 10)
+
+# How long a worker has to send a claimed batch before it's due again, in case
+# the worker died.
+EMAIL_OUTBOX_LEASE = timedelta(minutes=5)
+
+# How User.last_login is written on login. "exact" updates the row straight away,
+# "buffered" records logins in the cache and leaves writing them to the
+# flush_last_login_buffer task.
+LAST_LOGIN_UPDATE_MODE = env.str("DJANGO_LAST_LOGIN_UPDATE_MODE", "exact")
+
+# Number of buffered logins written per UPDATE.
+LAST_LOGIN_FLUSH_BATCH_SIZE = 500
+
+# Seconds buffered logins are kept for, a few flush_last_login_buffer
+# intervals, so that logins nothing flushes don't pile up in the cache.
+LAST_LOGIN_BUFFER_TIMEOUT = 10 * 60
+
+# Serve the async authentication views. Only turn this on when running under
+# ASGI, under WSGI every async view would run in its own event loop.
+ASYNC_AUTH_VIEWS = env.bool("DJANGO_ASYNC_AUTH_VIEWS", False)
+
+# Timeout in seconds for requests to Google's APIs.
+GOOGLE_API_TIMEOUT = env.float("DJANGO_GOOGLE_API_TIMEOUT", 5)
+
+# OAuth client ids that Google ID tokens must be issued for.
+GOOGLE_CLIENT_IDS = env.list("DJANGO_GOOGLE_CLIENT_IDS", default=[])
+
+# Keys used to verify Google ID tokens.
+GOOGLE_JWKS_URL = env.str(
+    "DJANGO_GOOGLE_JWKS_URL", "https://www.googleapis.com/oauth2/v3/certs"
+)
@@ -2,10 +2,13 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as AuthUserAdmin
 
 from simple_django.accounts.models import User
+from simple_django.core.pagination import EstimatedCountPaginator
 
 
 class UserAdmin(AuthUserAdmin):
-    pass
+    # Counting every user on each page load is too slow.
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 admin.site.register(User, UserAdmin)
@@ -0,0 +1,157 @@
+"""
+Async versions of the authentication endpoints in views.py, served instead of
+them when ASYNC_AUTH_VIEWS is on and the project runs under ASGI.
+
+DRF's views are sync only so these are plain Django views that mirror the
+request parsing and error responses of DRF.
+"""
+import functools
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, transaction
+from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.decorators import throttle_classes
+from rest_framework.exceptions import APIException, ParseError, Throttled
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from simple_django.accounts.api.serializers import (
+    EmailPasswordLoginSerializer,
+    EmailSignupSerializer,
+    LoginWithGoogleSerializer,
+)
+from simple_django.accounts.api.throttling import (
+    AuthEmailRateThrottle,
+    AuthIPRateThrottle,
+)
+from simple_django.accounts.api.utils import set_refresh_token_cookie
+
+
+def parse_data(request) -> dict:
+    if request.content_type == "application/json":
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError as e:
+            raise ParseError(f"JSON parse error - {e}")
+    return request.POST
+
+
+def api_exception_response(exc: APIException) -> JsonResponse:
+    """Build the same response as rest_framework.views.exception_handler."""
+    if isinstance(exc.detail, (list, dict)):
+        data = exc.detail
+    else:
+        data = {"detail": exc.detail}
+
+    response = JsonResponse(data, status=exc.status_code, safe=False)
+    if getattr(exc, "auth_header", None):
+        response["WWW-Authenticate"] = exc.auth_header
+    if getattr(exc, "wait", None):
+        response["Retry-After"] = "%d" % exc.wait
+    return response
+
+
+def check_throttles(request, view):
+    for throttle_class in getattr(view, "throttle_classes", ()):
+        throttle = throttle_class()
+        if not throttle.allow_request(request, view):
+            raise Throttled(throttle.wait())
+
+
+def async_api_view(view):
+    """
+    Accept POST requests only, apply the throttles set with DRF's
+    throttle_classes decorator and turn API exceptions into responses.
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "POST":
+            return JsonResponse(
+                {"detail": f'Method "{request.method}" not allowed.'},
+                status=status.HTTP_405_METHOD_NOT_ALLOWED,
+            )
+        try:
+            request.data = parse_data(request)
+            # Throttles use the cache, which has no async API.
+            await sync_to_async(check_throttles)(request, view)
+            return await view(request, *args, **kwargs)
+        except APIException as exc:
+            return api_exception_response(exc)
+
+    # Like rest_framework.decorators.api_view, CSRF is enforced by the
+    # authentication classes rather than the middleware.
+    wrapper.csrf_exempt = True
+
+    # Django can't wrap async views in ATOMIC_REQUESTS transactions, writes
+    # happen in AsyncSerializerMixin.acreate()'s transaction instead.
+    for alias in connections:
+        wrapper = transaction.non_atomic_requests(using=alias)(wrapper)
+    return wrapper
+
+
+@async_api_view
+@throttle_classes([AuthIPRateThrottle, AuthEmailRateThrottle])
+async def signup_with_email(request):
+    serializer = EmailSignupSerializer(data=request.data)
+    await serializer.ais_valid(raise_exception=True)
+    data = await serializer.asave()
+    response_data = {"access": data["tokens"]["access"], "user": data["user"]}
+    response = JsonResponse(response_data)
+    response = set_refresh_token_cookie(response, data["tokens"]["refresh"], 0)
+    return response
+
+
+@async_api_view
+@throttle_classes([AuthIPRateThrottle, AuthEmailRateThrottle])
+async def login_with_email_password(request):
+    auth_serializer = EmailPasswordLoginSerializer(data=request.data)
+    await auth_serializer.ais_valid(raise_exception=True)
+    auth_data = await auth_serializer.asave()
+    data = {
+        "access": auth_data["tokens"]["access"],
+        "user": auth_data["user"],
+    }
+
+    response = JsonResponse(data)
+    if auth_data["remember"]:
+        refresh_token_expiry = settings.SESSION_COOKIE_AGE
+    else:
+        refresh_token_expiry = 0
+    response = set_refresh_token_cookie(
+        response,
+        auth_data["tokens"]["refresh"],
+        refresh_token_expiry,
+    )
+    return response
+
+
+@async_api_view
+async def refresh_access_token(request):
+    try:
+        provided_token = request.COOKIES.get(settings.REFRESH_TOKEN_COOKIE_NAME)
+        if provided_token is None:
+            provided_token = request.data.get("refresh", "")
+        refresh = RefreshToken(provided_token)
+    except TokenError:
+        return JsonResponse(
+            {
+                "detail": "Session expired.",
+            },
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+    return JsonResponse({"access": str(refresh.access_token)})
+
+
+@async_api_view
+@throttle_classes([AuthIPRateThrottle])
+async def login_with_google(request):
+    serializer = LoginWithGoogleSerializer(data=request.data)
+    await serializer.ais_valid(raise_exception=True)
+    tokens = await serializer.asave()
+    response = JsonResponse(data={"access": tokens["access"]})
+    response = set_refresh_token_cookie(response, tokens["refresh"])
+    return response
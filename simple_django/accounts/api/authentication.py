@@ -0,0 +1,118 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+from rest_framework.authentication import BasicAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+
+def get_user_cache_key(user_id) -> str:
+    return f"jwt_authenticated_user_{user_id}"
+
+
+def get_cached_user(user_id):
+    return cache.get(
+        get_user_cache_key(user_id), version=settings.JWT_USER_CACHE_VERSION
+    )
+
+
+def set_cached_user(user):
+    cache.set(
+        get_user_cache_key(user.pk),
+        user,
+        settings.JWT_USER_CACHE_TIMEOUT,
+        version=settings.JWT_USER_CACHE_VERSION,
+    )
+
+
+def delete_cached_user(user_id):
+    cache.delete(get_user_cache_key(user_id), version=settings.JWT_USER_CACHE_VERSION)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that keeps authenticated users in the cache instead of
+    loading them from the database on every request.
+
+    Entries are keyed by user id only, tokens carry no per-user version to
+    key them by. Instead they're deleted by signals once a transaction saving
+    or deleting the user commits, so changes made with QuerySet.update() are
+    only seen once the entry expires. Bump JWT_USER_CACHE_VERSION to drop every
+    entry, e.g. when fields are added to the user model.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+
+        # Revocation depends on the token as well as the user, so don't cache.
+        if user_id is None or getattr(api_settings, "CHECK_REVOKE_TOKEN", False):
+            return super().get_user(validated_token)
+
+        user = get_cached_user(user_id)
+        if user is None:
+            # Only users that pass every check, e.g. active ones, are cached.
+            user = super().get_user(validated_token)
+            set_cached_user(user)
+        return user
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """
+    BasicAuthentication that remembers credentials it has checked for
+    BASIC_AUTH_CACHE_TIMEOUT seconds, so that clients sending them with every
+    request don't pay for hashing the password every time.
+
+    Entries are keyed by an HMAC of the credentials, so neither they nor the
+    password can be recovered from the cache, and hold a digest of the user's
+    password hash. Changing the password changes the hash and makes every
+    remembered entry for the user useless.
+    """
+
+    key_salt = "simple_django.accounts.api.authentication.CachedBasicAuthentication"
+
+    def get_credentials_cache_key(self, userid, password) -> str:
+        digest = salted_hmac(self.key_salt, f"{userid}\0{password}")
+        return f"basic_auth_credentials_{digest.hexdigest()}"
+
+    def get_password_digest(self, user) -> str:
+        return salted_hmac(self.key_salt, user.password).hexdigest()
+
+    def get_remembered_user(self, cache_key):
+        remembered = cache.get(cache_key)
+        if remembered is None:
+            return None
+
+        user_id, password_digest = remembered
+        user = get_cached_user(user_id)
+        if user is None:
+            User = get_user_model()
+            try:
+                user = User._default_manager.get(pk=user_id)
+            except User.DoesNotExist:
+                return None
+            set_cached_user(user)
+
+        if not user.is_active or self.get_password_digest(user) != password_digest:
+            return None
+        return user
+
+    def authenticate_credentials(self, userid, password, request=None):
+        cache_key = self.get_credentials_cache_key(userid, password)
+        user = self.get_remembered_user(cache_key)
+        if user is not None:
+            return user, None
+
+        user, auth = super().authenticate_credentials(userid, password, request)
+        set_cached_user(user)
+        cache.set(
+            cache_key,
+            (user.pk, self.get_password_digest(user)),
+            settings.BASIC_AUTH_CACHE_TIMEOUT,
+        )
+        return user, auth
+
+
+# For views only used by the frontend, which authenticates with JWTs. Other
+# authentication classes are skipped along with the header parsing they do.
+JWT_AUTHENTICATION_CLASSES = [CachedJWTAuthentication]
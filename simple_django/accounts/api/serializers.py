@@ -1,13 +1,22 @@
 import logging
+from functools import partial
 
-import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core import signing
 from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
 
+from simple_django.accounts import google, hashing
+from simple_django.accounts.api.authentication import delete_cached_user
 from simple_django.accounts.models import EmailAddress
-from simple_django.accounts.tasks import send_verification_email
+from simple_django.accounts.tasks import enqueue_verification_email
 
 User = get_user_model()
 
@@ -32,34 +41,115 @@ class UserSerializer(serializers.ModelSerializer):
         ]
 
 
-class EmailSignupSerializer(serializers.Serializer):
+class AsyncSerializerMixin:
+    """
+    Validate and save from async views without touching the database
+    synchronously.
+
+    Field validation runs as usual but avalidate() and acreate() take the place
+    of validate() and create(), so database access in a serializer must happen
+    in those. acreate() runs create() in a thread by default.
+    """
+
+    async def avalidate(self, attrs):
+        return attrs
+
+    async def acreate(self, validated_data):
+        # Async views are excluded from ATOMIC_REQUESTS, so writes get a
+        # transaction of their own.
+        return await sync_to_async(transaction.atomic(self.create))(validated_data)
+
+    async def ais_valid(self, raise_exception=False):
+        if not hasattr(self, "_validated_data"):
+            try:
+                value = self.to_internal_value(self.initial_data)
+                self.run_validators(value)
+                self._validated_data = await self.avalidate(value)
+            except (ValidationError, DjangoValidationError) as exc:
+                self._validated_data = {}
+                self._errors = as_serializer_error(exc)
+            else:
+                self._errors = {}
+
+        if self._errors and raise_exception:
+            raise ValidationError(self.errors)
+
+        return not bool(self._errors)
+
+    async def asave(self, **kwargs):
+        validated_data = {**self.validated_data, **kwargs}
+        self.instance = await self.acreate(validated_data)
+        return self.instance
+
+
+class EmailSignupSerializer(AsyncSerializerMixin, serializers.Serializer):
     username = serializers.CharField()
     email = serializers.EmailField()
     password = serializers.CharField()
     confirm_password = serializers.CharField()
 
-    def validate_email(self, value):
-        try:
-            User.objects.get(email=value)
-            raise ValidationError("A user with this email address already exists.")
-        except User.DoesNotExist:
-            pass
-        return value
+    email_exists_message = "A user with this email address already exists."
+
+    # Unique constraints checked by the database when the user is inserted,
+    # and the fields they report errors for.
+    unique_constraint_fields = {
+        "users_username_key": "username",
+        "users_email_upper_uniq": "email",
+    }
+
+    def validate_passwords(self, attrs):
+        if attrs["password"] != attrs["confirm_password"]:
+            raise ValidationError("Password and Confirm Password must be the same.")
 
     def validate(self, attrs):
         validated_data = super().validate(attrs)
-        if validated_data["password"] != validated_data["confirm_password"]:
-            raise ValidationError("Password and Confirm Password must be the same.")
+        self.validate_passwords(validated_data)
         user = User(email=validated_data["email"], username=validated_data["username"])
-        user.set_password(validated_data["password"])
-        user.full_clean()
+        hashing.set_password(user, validated_data["password"])
+        # Uniqueness is left to the database, see insert_user().
+        user.full_clean(validate_unique=False, validate_constraints=False)
         return {**validated_data, "user": user}
 
+    async def avalidate(self, attrs):
+        validated_data = await super().avalidate(attrs)
+        self.validate_passwords(validated_data)
+        user = User(email=validated_data["email"], username=validated_data["username"])
+        await hashing.aset_password(user, validated_data["password"])
+        user.full_clean(validate_unique=False, validate_constraints=False)
+        return {**validated_data, "user": user}
+
+    def get_unique_error(self, error: IntegrityError) -> ValidationError:
+        diag = getattr(error.__cause__, "diag", None)
+        field = self.unique_constraint_fields.get(
+            getattr(diag, "constraint_name", None)
+        )
+        if field is None:
+            raise error
+        if field == "email":
+            message = self.email_exists_message
+        else:
+            message = User._meta.get_field(field).error_messages["unique"]
+        return ValidationError({field: message})
+
+    def insert_user(self, user):
+        # Sign the user in with the same statement.
+        user.last_login = timezone.now()
+        try:
+            # In a savepoint, so that the caller's transaction stays usable
+            # after a taken username or email.
+            with transaction.atomic():
+                user.save_with_primary_email_address()
+        except IntegrityError as e:
+            raise self.get_unique_error(e) from e
+
     def create(self, validated_data):
         user = validated_data["user"]
-        user.save()
+        self.insert_user(user)
         user_serializer = UserSerializer(instance=user)
-        return {"tokens": user.get_auth_tokens(), "user": user_serializer.data}
+        return {
+            "tokens": user.get_auth_tokens(update_login_timestamp=False),
+            "user": user_serializer.data,
+        }
 
 
 class EmailAddressSerializer(serializers.ModelSerializer):
@@ -73,6 +163,9 @@ class EmailVerificationSerializer(serializers.Serializer):
     code = serializers.CharField()
 
     def validate_code(self, value):
+        if settings.EMAIL_VERIFICATION_CODE_MODE == "signed":
+            return self.validate_signed_code(value)
+
         user = self.context["request"].user
         try:
             email: EmailAddress = user.email_addresses.get(
@@ -83,7 +176,7 @@ class EmailVerificationSerializer(serializers.Serializer):
 
         cached_verification_code = cache.get(email.email_verification_cache_key)
         if cached_verification_code is None:
-            send_verification_email.delay(email.id)
+            enqueue_verification_email(email.id)
             raise ValidationError(
                 "Verification code expired. Please check your email for a new one."
             )
@@ -94,38 +187,76 @@ class EmailVerificationSerializer(serializers.Serializer):
 
         return value
 
+    def validate_signed_code(self, value):
+        try:
+            self.email_address_id = EmailAddress.verify_signed_code(
+                value, self.initial_data.get("email")
+            )
+        except signing.SignatureExpired:
+            enqueue_verification_email(EmailAddress.get_expired_code_id(value))
+            raise ValidationError(
+                "Verification code expired. Please check your email for a new one."
+            )
+        except signing.BadSignature:
+            raise ValidationError(
+                "Invalid verification code. Please enter the correct one."
+            )
+        return value
+
     def create(self, validated_data):
-        email_address: EmailAddress = self.context["request"].user.email_addresses.get(
+        user = self.context["request"].user
+        if settings.EMAIL_VERIFICATION_CODE_MODE == "signed":
+            return self.set_verified(user, validated_data["email"])
+
+        email_address: EmailAddress = user.email_addresses.get(
             email=validated_data["email"]
         )
         email_address.set_verified()
         return email_address
 
+    def set_verified(self, user, email):
+        # A single UPDATE, which also checks that the address belongs to user.
+        updated = EmailAddress.objects.filter(
+            pk=self.email_address_id, user=user, email=email
+        ).update(is_verified=True, updated_at=timezone.now())
+        if not updated:
+            raise ValidationError({"email": "Invalid email address."})
 
-class EmailPasswordLoginSerializer(serializers.Serializer):
+        # The update bypassed the signal that keeps cached users fresh, and
+        # a trigger may have changed primary_email_verified.
+        transaction.on_commit(partial(delete_cached_user, user.pk))
+        return EmailAddress(
+            pk=self.email_address_id, user=user, email=email, is_verified=True
+        )
+
+
+class EmailPasswordLoginSerializer(AsyncSerializerMixin, serializers.Serializer):
     email = serializers.EmailField()
     password = serializers.CharField()
     remember = serializers.BooleanField(required=False)
 
-    def validate_email(self, value):
+    def validate(self, attrs):
+        validated_data = super().validate(attrs)
         try:
-            User.objects.get(email=value)
+            user = User.objects.with_email(validated_data["email"]).get()
         except User.DoesNotExist:
-            raise ValidationError("Invalid email address.")
-        return value
+            raise ValidationError({"email": "Invalid email address."})
+        if not hashing.check_password(user, validated_data["password"]):
+            raise ValidationError({"password": "Invalid password."})
+        return {**validated_data, "user": user}
 
-    def validate_password(self, value):
+    async def avalidate(self, attrs):
+        validated_data = await super().avalidate(attrs)
         try:
-            user = User.objects.get(email=self.initial_data["email"])
-            password_valid = user.check_password(value)
-            if not password_valid:
-                raise ValidationError("Invalid password.")
+            user = await User.objects.with_email(validated_data["email"]).aget()
         except User.DoesNotExist:
-            pass
-        return value
+            raise ValidationError({"email": "Invalid email address."})
+        if not await hashing.acheck_password(user, validated_data["password"]):
+            raise ValidationError({"password": "Invalid password."})
+        return {**validated_data, "user": user}
 
     def save(self, **kwargs):
-        user = User.objects.get(email=self.validated_data["email"])
+        user = self.validated_data["user"]
         user_serializer = UserSerializer(instance=user)
         return {
             "tokens": user.get_auth_tokens(),
@@ -133,29 +264,76 @@ class EmailPasswordLoginSerializer(serializers.Serializer):
             "user": user_serializer.data,
         }
 
+    async def asave(self, **kwargs):
+        user = self.validated_data["user"]
+        user_serializer = UserSerializer(instance=user)
+        return {
+            "tokens": await user.aget_auth_tokens(),
+            "remember": self.validated_data.get("remember", False),
+            "user": user_serializer.data,
+        }
+
+
+class LoginWithGoogleSerializer(AsyncSerializerMixin, serializers.Serializer):
+    access_token = serializers.CharField(required=False)
+    id_token = serializers.CharField(required=False)
 
-class LoginWithGoogleSerializer(serializers.Serializer):
-    access_token = serializers.CharField()
+    def validate_tokens(self, attrs):
+        if ("access_token" in attrs) == ("id_token" in attrs):
+            raise ValidationError("Provide either an access token or an ID token.")
+
+    def get_user(self, google_user_profile):
+        try:
+            user = User.objects.with_email(google_user_profile["email"]).get()
+        except User.DoesNotExist:
+            user = User(
+                email=google_user_profile["email"],
+                first_name=google_user_profile.get("given_name", ""),
+                last_name=google_user_profile.get("family_name", ""),
+            )
+            user.full_clean()
+        return user
+
+    async def aget_user(self, google_user_profile):
+        try:
+            user = await User.objects.with_email(google_user_profile["email"]).aget()
+        except User.DoesNotExist:
+            user = User(
+                email=google_user_profile["email"],
+                first_name=google_user_profile.get("given_name", ""),
+                last_name=google_user_profile.get("family_name", ""),
+            )
+            # Model validation has no async API.
+            await sync_to_async(user.full_clean)()
+        return user
 
     def validate(self, attrs):
         validated_data = super().validate(attrs)
+        self.validate_tokens(validated_data)
         try:
-            response = requests.get(
-                "https://www.googleapis.com/oauth2/v3/userinfo",
-                headers={"Authorization": f"Bearer {validated_data['access_token']}"},
-            )
-            if response.ok:
-                google_user_profile = response.json()
-                try:
-                    user = User.objects.get(email=google_user_profile["email"])
-                except User.DoesNotexist:
-                    user = User(
-                        email=google_user_profile["email"],
-                        first_name=google_user_profile["given_name"],
-                        last_name=google_user_profile["family_name"],
-                    )
-                    user.full_clean()
-                return {**validated_data, "user": user}
+            if "id_token" in validated_data:
+                profile = google.verify_id_token(validated_data["id_token"])
+            else:
+                profile = google.get_userinfo(validated_data["access_token"])
+            user = self.get_user(profile)
+            return {**validated_data, "user": user}
+        except Exception as e:
+            log.exception(e)
+        raise ValidationError("Invalid token.")
+
+    async def avalidate(self, attrs):
+        validated_data = await super().avalidate(attrs)
+        self.validate_tokens(validated_data)
+        try:
+            if "id_token" in validated_data:
+                # Only blocks when Google's keys need downloading.
+                profile = await sync_to_async(
+                    google.verify_id_token, thread_sensitive=False
+                )(validated_data["id_token"])
+            else:
+                profile = await google.aget_userinfo(validated_data["access_token"])
+            user = await self.aget_user(profile)
+            return {**validated_data, "user": user}
         except Exception as e:
             log.exception(e)
         raise ValidationError("Invalid token.")
@@ -0,0 +1,107 @@
+import hashlib
+from collections.abc import Mapping
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+def hash_ident(ident: str) -> str:
+    """Hash to keep arbitrary input within what memcached accepts as a key."""
+    return hashlib.sha256(ident.encode()).hexdigest()
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    Sliding window throttle that keeps one counter per window in the cache.
+
+    Unlike DRF's throttles, which read, modify and write back a list of
+    timestamps, counters are updated with atomic add() and incr() so that
+    concurrent requests can't slip through. The request rate over the last
+    window is estimated by weighting the previous window's counter by how much
+    of it still overlaps the sliding window.
+    """
+
+    def get_rate(self):
+        # Read the rates at runtime rather than when DRF is imported.
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def get_window_key(self, window: int) -> str:
+        return f"{self.key}_{window}"
+
+    def incr(self, key: str) -> int:
+        self.cache.add(key, 0, self.duration * 2)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # The counter was evicted between add() and incr().
+            self.cache.set(key, 1, self.duration * 2)
+            return 1
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window, elapsed = divmod(self.now, self.duration)
+        self.current = self.incr(self.get_window_key(int(window)))
+        self.previous = self.cache.get(self.get_window_key(int(window) - 1), 0)
+        self.overlap = 1 - elapsed / self.duration
+
+        if self.current + self.previous * self.overlap > self.num_requests:
+            return self.throttle_failure()
+        return True
+
+    def wait(self):
+        """Return the number of seconds until the estimated rate is low enough."""
+        remaining_duration = self.overlap * self.duration
+        if self.current >= self.num_requests or not self.previous:
+            return remaining_duration
+
+        # How far the previous window's weight must shrink to make room for the
+        # next request in this window.
+        required_overlap = (self.num_requests - self.current - 1) / self.previous
+        return max(self.overlap - required_overlap, 0) * self.duration
+
+
+class AuthIPRateThrottle(SlidingWindowRateThrottle):
+    """Limit authentication attempts per client IP address."""
+
+    scope = "auth_ip"
+
+    def get_cache_key(self, request, view):
+        # X-Forwarded-For is client controlled, see NUM_PROXIES.
+        ident = hash_ident(self.get_ident(request))
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class AuthEmailRateThrottle(SlidingWindowRateThrottle):
+    """Limit authentication attempts per email address, whatever the client."""
+
+    scope = "auth_email"
+
+    def get_cache_key(self, request, view):
+        # The body may be any JSON value, the serializer rejects non-objects.
+        if not isinstance(request.data, Mapping):
+            return None
+        email = request.data.get("email")
+        if not isinstance(email, str) or not email:
+            return None
+
+        ident = hash_ident(email.strip().lower())
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class EmailVerificationUserRateThrottle(SlidingWindowRateThrottle):
+    """Limit email verification attempts per authenticated user."""
+
+    scope = "email_verification_user"
+
+    def get_cache_key(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": request.user.pk}
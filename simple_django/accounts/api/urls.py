@@ -1,7 +1,11 @@
+from django.conf import settings
 from django.urls import path
 from rest_framework.routers import SimpleRouter
 
-from . import views
+from . import async_views, views
+
+# The sync views remain the default for WSGI deployments.
+auth_views = async_views if settings.ASYNC_AUTH_VIEWS else views
 
 app_name = "accounts"
 
@@ -10,13 +14,14 @@ router.register("email-addresses", views.EmailAddressViewSet)
 
 urlpatterns = [
     path("user/", views.UserAPIView.as_view(), name="user"),
-    path("email-signup/", views.signup_with_email, name="email-signup"),
+    path("users/", views.UserListAPIView.as_view(), name="users"),
+    path("email-signup/", auth_views.signup_with_email, name="email-signup"),
     path(
         "email-password-login/",
-        views.login_with_email_password,
+        auth_views.login_with_email_password,
         name="email-password-login",
     ),
-    path("google-login/", views.login_with_google, name="google-login"),
+    path("google-login/", auth_views.login_with_google, name="google-login"),
     path("logout/", views.logout, name="logout"),
-    path("refresh-token/", views.refresh_access_token, name="refresh-token"),
+    path("refresh-token/", auth_views.refresh_access_token, name="refresh-token"),
 ] + router.urls
@@ -1,19 +1,26 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework import status
-from rest_framework.decorators import action, api_view
-from rest_framework.generics import RetrieveUpdateDestroyAPIView
+from rest_framework.decorators import (
+    action,
+    api_view,
+    authentication_classes,
+    throttle_classes,
+)
+from rest_framework.generics import ListAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.mixins import (
     CreateModelMixin,
     DestroyModelMixin,
+    ListModelMixin,
     RetrieveModelMixin,
 )
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from simple_django.accounts.api.authentication import JWT_AUTHENTICATION_CLASSES
 from simple_django.accounts.api.permissions import IsEmailAddressOwnerOrReadOnly
 from simple_django.accounts.api.serializers import (
     EmailAddressSerializer,
@@ -23,6 +30,11 @@ from simple_django.accounts.api.serializers import (
     LoginWithGoogleSerializer,
     UserSerializer,
 )
+from simple_django.accounts.api.throttling import (
+    AuthEmailRateThrottle,
+    AuthIPRateThrottle,
+    EmailVerificationUserRateThrottle,
+)
 from simple_django.accounts.api.utils import set_refresh_token_cookie
 from simple_django.accounts.models import EmailAddress
 
@@ -38,7 +50,15 @@ class UserAPIView(RetrieveUpdateDestroyAPIView):
         return self.request.user
 
 
+class UserListAPIView(ListAPIView):
+    permission_classes = [IsAdminUser]
+    serializer_class = UserSerializer
+    queryset = User.objects.all()
+
+
 @api_view(http_method_names=["POST"])
+@authentication_classes([])
+@throttle_classes([AuthIPRateThrottle, AuthEmailRateThrottle])
 def signup_with_email(request):
     serializer = EmailSignupSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
@@ -50,6 +70,8 @@ def signup_with_email(request):
 
 
 @api_view(http_method_names=["POST"])
+@authentication_classes([])
+@throttle_classes([AuthIPRateThrottle, AuthEmailRateThrottle])
 def login_with_email_password(request):
     auth_serializer = EmailPasswordLoginSerializer(data=request.data)
     auth_serializer.is_valid(raise_exception=True)
@@ -73,6 +95,7 @@ def login_with_email_password(request):
 
 
 @api_view(http_method_names=["POST"])
+@authentication_classes([])
 def logout(request):
     response = Response()
     response.delete_cookie(
@@ -85,6 +108,7 @@ def logout(request):
 
 
 @api_view(http_method_names=["POST"])
+@authentication_classes([])
 def refresh_access_token(request):
     try:
         provided_token = request.COOKIES.get(settings.REFRESH_TOKEN_COOKIE_NAME)
@@ -102,8 +126,10 @@ def refresh_access_token(request):
 
 
 @api_view(http_method_names=["POST"])
+@authentication_classes([])
+@throttle_classes([AuthIPRateThrottle])
 def login_with_google(request):
-    serializer = LoginWithGoogleSerializer(request.data)
+    serializer = LoginWithGoogleSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     tokens = serializer.save()
     response = Response(data={"access": tokens["access"]})
@@ -112,13 +138,29 @@ def login_with_google(request):
 
 
 class EmailAddressViewSet(
-    RetrieveModelMixin, CreateModelMixin, DestroyModelMixin, GenericViewSet
+    ListModelMixin,
+    RetrieveModelMixin,
+    CreateModelMixin,
+    DestroyModelMixin,
+    GenericViewSet,
 ):
+    authentication_classes = JWT_AUTHENTICATION_CLASSES
     serializer_class = EmailAddressSerializer
     queryset = EmailAddress.objects.all()
     permission_classes = [IsAuthenticated, IsEmailAddressOwnerOrReadOnly]
 
-    @action(detail=False, methods=["POST"])
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            # Users list their own addresses only.
+            queryset = queryset.filter(user=self.request.user)
+        return queryset
+
+    @action(
+        detail=False,
+        methods=["POST"],
+        throttle_classes=[AuthIPRateThrottle, EmailVerificationUserRateThrottle],
+    )
     def verify_email(self, request):
         serializer = EmailVerificationSerializer(
             data=request.data, context={"request": request}
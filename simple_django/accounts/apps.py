@@ -1,6 +1,6 @@
 from django.apps import AppConfig
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 
 
 class AccountsConfig(AppConfig):
@@ -16,3 +16,11 @@ class AccountsConfig(AppConfig):
         post_save.connect(
             signals.send_verification_email_on_create, sender=models.EmailAddress
         )
+        post_save.connect(signals.invalidate_cached_user, sender=get_user_model())
+        post_delete.connect(signals.invalidate_cached_user, sender=get_user_model())
+        post_save.connect(
+            signals.invalidate_cached_email_address_user, sender=models.EmailAddress
+        )
+        post_delete.connect(
+            signals.invalidate_cached_email_address_user, sender=models.EmailAddress
+        )
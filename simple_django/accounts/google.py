@@ -0,0 +1,169 @@
+"""
+Sign in with Google.
+
+Users are identified either by an OAuth access token, exchanged for their
+profile with Google's userinfo endpoint, or by an ID token, which is verified
+locally against Google's signing keys without a request to Google per login.
+"""
+import asyncio
+import re
+import threading
+import time
+import weakref
+
+import httpx
+import jwt
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+
+USERINFO_URL = "https://www.googleapis.com/oauth2/v3/userinfo"
+
+ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+JWKS_CACHE_KEY = "google_jwks"
+
+# Used when Google's response has no usable Cache-Control max-age.
+DEFAULT_JWKS_MAX_AGE = 3600
+
+# Unknown key ids force a download at most this often, so that tokens with
+# made up key ids can't be used to hammer Google.
+MIN_REFRESH_INTERVAL = 60
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+# Shared by every request of this process so that connections to Google are
+# kept alive and reused.
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_maxsize=10))
+
+# The async counterpart of session, one per event loop since connections
+# can't be shared between loops.
+_async_clients = weakref.WeakKeyDictionary()
+
+_lock = threading.Lock()
+_signing_keys = {}
+_signing_keys_expiry = 0.0
+_signing_keys_fetched_at = 0.0
+
+
+class GoogleTokenError(Exception):
+    pass
+
+
+def get_userinfo(access_token: str) -> dict:
+    response = session.get(
+        USERINFO_URL,
+        headers={"Authorization": f"Bearer {access_token}"},
+        timeout=settings.GOOGLE_API_TIMEOUT,
+    )
+    if not response.ok:
+        raise GoogleTokenError(f"Userinfo request failed with {response.status_code}.")
+    return response.json()
+
+
+def get_async_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            timeout=settings.GOOGLE_API_TIMEOUT,
+            limits=httpx.Limits(max_keepalive_connections=10),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aget_userinfo(access_token: str) -> dict:
+    response = await get_async_client().get(
+        USERINFO_URL, headers={"Authorization": f"Bearer {access_token}"}
+    )
+    if not response.is_success:
+        raise GoogleTokenError(f"Userinfo request failed with {response.status_code}.")
+    return response.json()
+
+
+def fetch_jwks() -> tuple[dict, int]:
+    """Download Google's key set and return it with its max-age in seconds."""
+    response = session.get(
+        settings.GOOGLE_JWKS_URL, timeout=settings.GOOGLE_API_TIMEOUT
+    )
+    response.raise_for_status()
+    match = _MAX_AGE_RE.search(response.headers.get("Cache-Control", ""))
+    max_age = int(match.group(1)) if match else DEFAULT_JWKS_MAX_AGE
+    return response.json(), max_age
+
+
+def get_signing_keys(refresh: bool = False) -> dict:
+    """
+    Return Google's signing keys by key id.
+
+    Keys are kept in memory and in the shared cache for as long as Google's
+    Cache-Control header allows, so they're downloaded once per expiry across
+    every process rather than once per login.
+    """
+    global _signing_keys, _signing_keys_expiry, _signing_keys_fetched_at
+
+    if refresh and time.time() - _signing_keys_fetched_at < MIN_REFRESH_INTERVAL:
+        refresh = False
+
+    if not refresh and time.time() < _signing_keys_expiry:
+        return _signing_keys
+
+    with _lock:
+        if not refresh and time.time() < _signing_keys_expiry:
+            return _signing_keys
+
+        cached = None if refresh else cache.get(JWKS_CACHE_KEY)
+        if cached is None:
+            jwks, max_age = fetch_jwks()
+            _signing_keys_fetched_at = time.time()
+            expiry = _signing_keys_fetched_at + max_age
+            cache.set(JWKS_CACHE_KEY, (jwks, expiry), max_age)
+        else:
+            jwks, expiry = cached
+
+        _signing_keys = {key.key_id: key for key in jwt.PyJWKSet.from_dict(jwks).keys}
+        _signing_keys_expiry = expiry
+
+    return _signing_keys
+
+
+def clear_signing_keys():
+    global _signing_keys, _signing_keys_expiry, _signing_keys_fetched_at
+
+    with _lock:
+        _signing_keys = {}
+        _signing_keys_expiry = 0.0
+        _signing_keys_fetched_at = 0.0
+    cache.delete(JWKS_CACHE_KEY)
+
+
+def verify_id_token(id_token: str) -> dict:
+    """Verify an ID token issued by Google and return its claims."""
+    try:
+        key_id = jwt.get_unverified_header(id_token).get("kid")
+        signing_key = get_signing_keys().get(key_id)
+        if signing_key is None:
+            # Google may have rotated its keys before our copy expired.
+            signing_key = get_signing_keys(refresh=True).get(key_id)
+        if signing_key is None:
+            raise GoogleTokenError(f"Unknown signing key {key_id}.")
+
+        claims = jwt.decode(
+            id_token,
+            signing_key.key,
+            algorithms=["RS256"],
+            audience=settings.GOOGLE_CLIENT_IDS,
+            options={"require": ["exp", "iss", "aud", "email"]},
+        )
+    except jwt.PyJWTError as e:
+        raise GoogleTokenError(str(e)) from e
+
+    if claims["iss"] not in ISSUERS:
+        raise GoogleTokenError(f"Invalid issuer {claims['iss']}.")
+    if not claims.get("email_verified"):
+        raise GoogleTokenError("Email address not verified by Google.")
+
+    return claims
@@ -0,0 +1,65 @@
+import json
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    BCryptSHA256PasswordHasher,
+    PBKDF2PasswordHasher,
+)
+
+# Lower bounds that calibration never goes under, however slow the host is.
+# https://cheatsheetseries.owasp.org/cheatsheets/Password_Storage_Cheat_Sheet.html
+ARGON2_MIN_TIME_COST = 2
+ARGON2_MIN_MEMORY_COST = 19456
+BCRYPT_MIN_ROUNDS = 10
+PBKDF2_MIN_ITERATIONS = 600_000
+
+
+@lru_cache
+def load_parameters(path: str) -> dict:
+    """
+    Return the parameters written by the calibrate_password_hashers command,
+    or an empty dict if the host hasn't been calibrated.
+    """
+    try:
+        return json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return {}
+
+
+class CalibratedParameter:
+    """
+    Read a hasher attribute from the calibrated parameters file, falling back to
+    the default of the built-in hasher.
+    """
+
+    def __init__(self, default):
+        self.default = default
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        parameters = load_parameters(str(settings.PASSWORD_HASHERS_PARAMETERS_FILE))
+        return parameters.get(owner.algorithm, {}).get(self.name, self.default)
+
+
+# The algorithm names are unchanged so existing hashes keep being recognised.
+# Hashes made with other parameters are upgraded by the must_update() check on
+# the next successful login.
+
+
+class CalibratedArgon2PasswordHasher(Argon2PasswordHasher):
+    time_cost = CalibratedParameter(Argon2PasswordHasher.time_cost)
+    memory_cost = CalibratedParameter(Argon2PasswordHasher.memory_cost)
+    parallelism = CalibratedParameter(Argon2PasswordHasher.parallelism)
+
+
+class CalibratedBCryptSHA256PasswordHasher(BCryptSHA256PasswordHasher):
+    rounds = CalibratedParameter(BCryptSHA256PasswordHasher.rounds)
+
+
+class CalibratedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = CalibratedParameter(PBKDF2PasswordHasher.iterations)
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+
+
+class PasswordHashingUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many authentication requests. Please try again shortly."
+    default_code = "password_hashing_unavailable"
+
+    def __init__(self, wait: int, detail=None, code=None):
+        super().__init__(detail, code)
+        # DRF's exception handler turns this into a Retry-After header.
+        self.wait = wait
+
+
+def _get_executor() -> tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+    """
+    Lazily create the hashing pool so that it's never inherited across a fork,
+    e.g. when gunicorn preloads the application.
+    """
+    global _executor, _slots
+
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                workers = settings.PASSWORD_HASHING_WORKERS
+                _slots = threading.BoundedSemaphore(
+                    workers + settings.PASSWORD_HASHING_QUEUE_SIZE
+                )
+                _executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="password-hashing"
+                )
+    return _executor, _slots
+
+
+def shutdown():
+    global _executor, _slots
+
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+        _executor = None
+        _slots = None
+
+
+def _submit(fn, *args) -> Future:
+    executor, slots = _get_executor()
+
+    if not slots.acquire(blocking=False):
+        raise PasswordHashingUnavailable(wait=settings.PASSWORD_HASHING_RETRY_AFTER)
+
+    try:
+        future = executor.submit(fn, *args)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+
+def run(fn, *args):
+    """
+    Run a password hashing function on the bounded hashing pool and wait for
+    the result.
+
+    Raise PasswordHashingUnavailable straight away instead of queueing when
+    every worker is busy and the queue is full.
+    """
+    if settings.PASSWORD_HASHING_WORKERS <= 0:
+        return fn(*args)
+    return _submit(fn, *args).result()
+
+
+async def arun(fn, *args):
+    """Async version of run() that doesn't block the event loop while hashing."""
+    if settings.PASSWORD_HASHING_WORKERS <= 0:
+        return fn(*args)
+    return await asyncio.wrap_future(_submit(fn, *args))
+
+
+def make_password(raw_password: str) -> str:
+    return run(hashers.make_password, raw_password)
+
+
+def set_password(user, raw_password: str):
+    """Equivalent of user.set_password() that hashes on the hashing pool."""
+    user.password = make_password(raw_password)
+    user._password = raw_password
+
+
+def check_password(user, raw_password: str) -> bool:
+    """
+    Equivalent of user.check_password() that hashes on the hashing pool.
+
+    Upgrading an outdated hash is done on the calling thread so that the write
+    happens inside the request's transaction.
+    """
+    needs_rehash = []
+    valid = run(
+        hashers.check_password, raw_password, user.password, needs_rehash.append
+    )
+    if valid and needs_rehash:
+        set_password(user, raw_password)
+        user._password = None
+        user.save(update_fields=["password"])
+    return valid
+
+
+async def amake_password(raw_password: str) -> str:
+    return await arun(hashers.make_password, raw_password)
+
+
+async def aset_password(user, raw_password: str):
+    user.password = await amake_password(raw_password)
+    user._password = raw_password
+
+
+async def acheck_password(user, raw_password: str) -> bool:
+    needs_rehash = []
+    valid = await arun(
+        hashers.check_password, raw_password, user.password, needs_rehash.append
+    )
+    if valid and needs_rehash:
+        await aset_password(user, raw_password)
+        user._password = None
+        await user.asave(update_fields=["password"])
+    return valid
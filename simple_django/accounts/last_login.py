@@ -0,0 +1,112 @@
+"""
+Write-behind buffer for User.last_login.
+
+In buffered mode logins append (user id, timestamp) entries to numbered slots
+in the cache instead of writing to the users table. The flush_last_login_buffer
+task periodically writes them in bulk with one UPDATE per batch.
+
+last_login is informational, so entries evicted from the cache before a flush
+are simply lost. Slots expire after LAST_LOGIN_BUFFER_TIMEOUT in case nothing
+flushes them.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from simple_django.accounts.api.authentication import get_user_cache_key
+
+SEQUENCE_KEY = "last_login_buffer_sequence"
+FLUSHED_KEY = "last_login_buffer_flushed"
+FLUSH_LOCK_KEY = "last_login_buffer_flush_lock"
+SETTLED_KEY = "last_login_buffer_settled"
+
+
+def get_slot_key(number: int) -> str:
+    return f"last_login_buffer_{number}"
+
+
+def is_buffered() -> bool:
+    return settings.LAST_LOGIN_UPDATE_MODE == "buffered"
+
+
+def record(user_id: int, timestamp):
+    cache.add(SEQUENCE_KEY, 0, None)
+    try:
+        number = cache.incr(SEQUENCE_KEY)
+    except ValueError:
+        # The sequence was evicted between add() and incr().
+        cache.add(SEQUENCE_KEY, 0, None)
+        number = cache.incr(SEQUENCE_KEY)
+    cache.set(
+        get_slot_key(number), (user_id, timestamp), settings.LAST_LOGIN_BUFFER_TIMEOUT
+    )
+
+
+def write_batch(last_logins: dict) -> int:
+    """Write {user id: last login} with a single UPDATE."""
+    values = ", ".join(["(%s, %s::timestamptz)"] * len(last_logins))
+    params = [value for item in last_logins.items() for value in item]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE users SET last_login = buffered.last_login
+            FROM (VALUES {values}) AS buffered (id, last_login)
+            WHERE users.id = buffered.id
+            AND (users.last_login IS NULL OR users.last_login < buffered.last_login)
+            """,
+            params,
+        )
+        return cursor.rowcount
+
+
+def flush(batch_size: int = None) -> int:
+    """
+    Write buffered logins to the database and return the number of rows
+    updated.
+
+    record() takes a slot number before writing the slot, so flushing stops at
+    the first missing slot rather than skipping a login that's about to be
+    written. Slots taken before the previous flush have had time to be
+    written, those still missing were evicted and are skipped.
+    """
+    batch_size = batch_size or settings.LAST_LOGIN_FLUSH_BATCH_SIZE
+    sequence = cache.get(SEQUENCE_KEY, 0)
+    flushed = cache.get(FLUSHED_KEY, 0)
+    settled = cache.get(SETTLED_KEY, 0)
+    if flushed > sequence:
+        # The sequence was evicted and started again from zero.
+        flushed = settled = 0
+
+    updated = 0
+    for start in range(flushed + 1, sequence + 1, batch_size):
+        end = min(start + batch_size, sequence + 1)
+        slots = cache.get_many([get_slot_key(number) for number in range(start, end)])
+
+        last_logins = {}
+        stopped = False
+        for number in range(start, end):
+            slot = slots.get(get_slot_key(number))
+            if slot is None:
+                if number > settled:
+                    end, stopped = number, True
+                    break
+                continue
+            user_id, timestamp = slot
+            if user_id not in last_logins or last_logins[user_id] < timestamp:
+                last_logins[user_id] = timestamp
+
+        if last_logins:
+            updated += write_batch(last_logins)
+            # The rows were updated behind the post_save signal's back.
+            cache.delete_many(
+                [get_user_cache_key(user_id) for user_id in last_logins],
+                version=settings.JWT_USER_CACHE_VERSION,
+            )
+
+        cache.delete_many([get_slot_key(number) for number in range(start, end)])
+        cache.set(FLUSHED_KEY, end - 1, None)
+        if stopped:
+            break
+
+    cache.set(SETTLED_KEY, sequence, None)
+    return updated
@@ -1,6 +1,16 @@
+from django.contrib.auth.models import UserManager as AuthUserManager
 from django.db import models
 
 
+class UserManager(AuthUserManager):
+    def with_email(self, email: str):
+        """
+        Filter users by email address, ignoring case, in a way that can use
+        the users_email_upper_uniq index.
+        """
+        return self.filter(email__iexact=email).exclude(email="")
+
+
 class EmailAddressManager(models.Manager):
     def primary(self):
         return self.get(is_primary=True)
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:15
+
+from django.db import migrations
+
+import simple_django.accounts.managers
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0002_emailaddress"),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name="user",
+            managers=[
+                ("objects", simple_django.accounts.managers.UserManager()),
+            ],
+        ),
+    ]
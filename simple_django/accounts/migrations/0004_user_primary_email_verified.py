@@ -0,0 +1,71 @@
+from django.db import migrations, models
+
+CREATE_TRIGGERS = """
+CREATE FUNCTION primary_email_verified(user_id bigint) RETURNS boolean AS $$
+    SELECT EXISTS (
+        SELECT 1 FROM email_addresses
+        WHERE email_addresses.user_id = $1 AND is_primary AND is_verified
+    );
+$$ LANGUAGE sql STABLE;
+
+-- Keep users.primary_email_verified in sync when email addresses change.
+CREATE FUNCTION email_addresses_sync_primary_email_verified() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE users SET primary_email_verified = primary_email_verified(OLD.user_id)
+        WHERE id = OLD.user_id
+        AND primary_email_verified IS DISTINCT FROM primary_email_verified(OLD.user_id);
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.user_id <> OLD.user_id) THEN
+        UPDATE users SET primary_email_verified = primary_email_verified(NEW.user_id)
+        WHERE id = NEW.user_id
+        AND primary_email_verified IS DISTINCT FROM primary_email_verified(NEW.user_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER email_addresses_sync_primary_email_verified
+AFTER INSERT OR DELETE OR UPDATE OF user_id, is_primary, is_verified
+ON email_addresses
+FOR EACH ROW EXECUTE FUNCTION email_addresses_sync_primary_email_verified();
+
+-- Saving a user from Django writes whatever value the instance was loaded
+-- with, so the column is always recomputed rather than trusted.
+CREATE FUNCTION users_sync_primary_email_verified() RETURNS trigger AS $$
+BEGIN
+    NEW.primary_email_verified := primary_email_verified(NEW.id);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER users_sync_primary_email_verified
+BEFORE INSERT OR UPDATE OF primary_email_verified
+ON users
+FOR EACH ROW EXECUTE FUNCTION users_sync_primary_email_verified();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER users_sync_primary_email_verified ON users;
+DROP FUNCTION users_sync_primary_email_verified();
+DROP TRIGGER email_addresses_sync_primary_email_verified ON email_addresses;
+DROP FUNCTION email_addresses_sync_primary_email_verified();
+DROP FUNCTION primary_email_verified(bigint);
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0003_alter_user_managers"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="primary_email_verified",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        # Existing rows are populated by the backfill_primary_email_verified
+        # management command.
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0004_user_primary_email_verified"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxEmail",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "available_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "email_address",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="outbox_emails",
+                        to="accounts.emailaddress",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "email_outbox",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        fields=["available_at"], name="email_outbo_availab_46f370_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:43
+
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+# Users may have ended up with more than one primary address. Keep the one
+# matching their email, or else the most recently updated one.
+DEMOTE_EXTRA_PRIMARY_ADDRESSES = """
+UPDATE email_addresses SET is_primary = false, updated_at = now()
+WHERE is_primary AND id NOT IN (
+    SELECT DISTINCT ON (email_addresses.user_id) email_addresses.id
+    FROM email_addresses JOIN users ON users.id = email_addresses.user_id
+    WHERE email_addresses.is_primary
+    ORDER BY email_addresses.user_id, email_addresses.email = users.email DESC,
+        email_addresses.updated_at DESC, email_addresses.id DESC
+)
+"""
+
+FIND_DUPLICATE_EMAILS = """
+SELECT upper(email), array_agg(id ORDER BY id) FROM users
+WHERE email <> ''
+GROUP BY upper(email) HAVING count(*) > 1
+ORDER BY 1
+LIMIT 20
+"""
+
+
+def check_duplicate_emails(apps, schema_editor):
+    """
+    Refuse to go on while emails are shared by several users, which accounts
+    to keep is for a person to decide.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(FIND_DUPLICATE_EMAILS)
+        duplicates = cursor.fetchall()
+    if duplicates:
+        details = "\n".join(f"{email}: users {ids}" for email, ids in duplicates)
+        raise RuntimeError(
+            "Users share email addresses ignoring case, merge or change them "
+            f"before migrating:\n{details}"
+        )
+
+
+class Migration(migrations.Migration):
+    # Indexes are built with CREATE INDEX CONCURRENTLY, which can't run in a
+    # transaction, so that writes to the tables aren't blocked meanwhile.
+    atomic = False
+
+    dependencies = [
+        ("accounts", "0005_email_outbox"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        migrations.RunSQL(DEMOTE_EXTRA_PRIMARY_ADDRESSES, migrations.RunSQL.noop),
+        AddIndexConcurrently(
+            model_name="emailaddress",
+            index=models.Index(
+                fields=["user", "email"], name="email_addre_user_id_8ce514_idx"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="emailaddress",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="email_addresses",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        # AddConstraint has no concurrent version, build the unique indexes
+        # backing the constraints by hand.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    "CREATE UNIQUE INDEX CONCURRENTLY "
+                    "email_addresses_one_primary_per_user "
+                    "ON email_addresses (user_id) WHERE is_primary",
+                    "DROP INDEX CONCURRENTLY email_addresses_one_primary_per_user",
+                ),
+                migrations.RunSQL(
+                    "CREATE UNIQUE INDEX CONCURRENTLY users_email_upper_uniq "
+                    "ON users (upper(email)) WHERE NOT (email = '')",
+                    "DROP INDEX CONCURRENTLY users_email_upper_uniq",
+                ),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name="emailaddress",
+                    constraint=models.UniqueConstraint(
+                        condition=models.Q(("is_primary", True)),
+                        fields=("user",),
+                        name="email_addresses_one_primary_per_user",
+                    ),
+                ),
+                migrations.AddConstraint(
+                    model_name="user",
+                    constraint=models.UniqueConstraint(
+                        django.db.models.functions.text.Upper("email"),
+                        condition=models.Q(("email", ""), _negated=True),
+                        name="users_email_upper_uniq",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:49
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run in a transaction.
+    atomic = False
+
+    dependencies = [
+        ("accounts", "0006_email_indexes"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="emailaddress",
+            index=models.Index(
+                fields=["user", "-updated_at", "-id"],
+                name="email_addre_user_id_e314e3_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="user",
+            index=models.Index(
+                fields=["-date_joined", "-id"], name="users_date_jo_cdf9fa_idx"
+            ),
+        ),
+    ]
@@ -1,37 +1,118 @@
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.core import cache
-from django.core.mail import send_mail
-from django.db import models
+from django.core import cache, signing
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connections, models, router, transaction
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Upper
+from django.db.models.sql import InsertQuery
 from django.template.loader import render_to_string
 from django.utils import timezone
 from django.utils.crypto import get_random_string
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from simple_django.accounts.managers import EmailAddressManager
+from simple_django.accounts import last_login
+from simple_django.accounts.managers import EmailAddressManager, UserManager
 from simple_django.accounts.types import UserAuthTokensDict
 
 
+def get_insert_sql(obj: models.Model, using: str) -> tuple[str, tuple]:
+    """Return the INSERT statement saving obj, returning its primary key."""
+    meta = obj._meta
+    query = InsertQuery(type(obj))
+    query.insert_values(
+        [field for field in meta.local_concrete_fields if field is not meta.auto_field],
+        [obj],
+    )
+    compiler = query.get_compiler(using=using)
+    compiler.returning_fields = [meta.pk]
+    [(sql, params)] = compiler.as_sql()
+    return sql, params
+
+
 class User(AbstractUser):
+    # Maintained by database triggers on both tables, see migration 0004.
+    primary_email_verified = models.BooleanField(default=False, editable=False)
+
+    objects = UserManager()
+
+    def save_with_primary_email_address(self) -> "EmailAddress":
+        """
+        Insert a new user together with their primary email address and its
+        verification email in a single statement, and return the address.
+
+        This stands in for save() and the post_save signals creating the
+        address and outbox email, which take a round trip each. Raises
+        IntegrityError if the username or email address is taken.
+        """
+        using = router.db_for_write(User, instance=self)
+        email_address = EmailAddress(
+            user_id=RawSQL("(SELECT id FROM new_user)", ()),
+            email=self.email,
+            is_primary=True,
+        )
+        outbox_email = OutboxEmail(
+            email_address_id=RawSQL("(SELECT id FROM new_email_address)", ())
+        )
+        statements = [
+            get_insert_sql(obj, using) for obj in (self, email_address, outbox_email)
+        ]
+        sql = (
+            "WITH new_user AS ({}), new_email_address AS ({}), "
+            "new_outbox_email AS ({}) "
+            "SELECT (SELECT id FROM new_user), (SELECT id FROM new_email_address)"
+        ).format(*(sql for sql, _ in statements))
+
+        with connections[using].cursor() as cursor:
+            cursor.execute(sql, [param for _, params in statements for param in params])
+            self.pk, email_address.pk = cursor.fetchone()
+
+        self._state.adding = False
+        self._state.db = using
+        email_address.user = self
+        email_address._state.adding = False
+        email_address._state.db = using
+        return email_address
+
+    async def asave_with_primary_email_address(self) -> "EmailAddress":
+        return await sync_to_async(self.save_with_primary_email_address)()
+
     def update_login_timestamp(self):
         self.last_login = timezone.now()
-        self.save()
+        if last_login.is_buffered():
+            last_login.record(self.pk, self.last_login)
+        else:
+            self.save(update_fields=["last_login"])
+
+    async def aupdate_login_timestamp(self):
+        self.last_login = timezone.now()
+        if last_login.is_buffered():
+            # The cache has no async API.
+            await sync_to_async(last_login.record)(self.pk, self.last_login)
+        else:
+            await self.asave(update_fields=["last_login"])
 
     @property
     def email_verified(self):
-        verified = False
-        try:
-            email_address = self.email_addresses.primary()
-            if email_address.is_verified:
-                verified = True
-        except EmailAddress.DoesNotExist:
-            verified = False
+        return self.primary_email_verified
 
-        return verified
+    def get_auth_tokens(
+        self, as_dict=True, update_login_timestamp=True
+    ) -> UserAuthTokensDict | RefreshToken:
+        refresh = RefreshToken.for_user(self)
+        if update_login_timestamp:
+            self.update_login_timestamp()
+        if as_dict:
+            return {"refresh": str(refresh), "access": str(refresh.access_token)}
+        return refresh
 
-    def get_auth_tokens(self, as_dict=True) -> UserAuthTokensDict | RefreshToken:
+    async def aget_auth_tokens(
+        self, as_dict=True, update_login_timestamp=True
+    ) -> UserAuthTokensDict | RefreshToken:
         refresh = RefreshToken.for_user(self)
-        self.update_login_timestamp()
+        if update_login_timestamp:
+            await self.aupdate_login_timestamp()
         if as_dict:
             return {"refresh": str(refresh), "access": str(refresh.access_token)}
         return refresh
@@ -39,11 +120,23 @@ class User(AbstractUser):
     class Meta:
         ordering = ["-date_joined"]
         db_table = "users"
+        # For keyset pagination, see simple_django.core.pagination.
+        indexes = [models.Index(fields=["-date_joined", "-id"])]
+        constraints = [
+            # Also the index for case-insensitive lookups, see
+            # UserManager.with_email(). Users may have no email address.
+            models.UniqueConstraint(
+                Upper("email"),
+                condition=~models.Q(email=""),
+                name="users_email_upper_uniq",
+            ),
+        ]
 
 
 class EmailAddress(models.Model):
+    # Indexed by the (user, email) index.
     user = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name="email_addresses"
+        User, on_delete=models.CASCADE, related_name="email_addresses", db_index=False
     )
     email = models.EmailField()
     is_primary = models.BooleanField(default=False)
@@ -55,15 +148,59 @@ class EmailAddress(models.Model):
     objects = EmailAddressManager()
 
     def set_as_primary(self):
-        self.user.email = self.email
-        self.user.save()
-        self.is_primary = True
-        self.save()
+        with transaction.atomic():
+            # Users can have only one primary address.
+            EmailAddress.objects.filter(user_id=self.user_id, is_primary=True).exclude(
+                pk=self.pk
+            ).update(is_primary=False, updated_at=timezone.now())
+            self.user.email = self.email
+            self.user.save()
+            self.is_primary = True
+            self.save()
 
     @property
     def email_verification_cache_key(self):
         return f"email_verification_code_{self.id}"
 
+    @property
+    def email_verification_task_cache_key(self):
+        return f"email_verification_task_{self.id}"
+
+    @staticmethod
+    def get_verification_signer() -> signing.TimestampSigner:
+        return signing.TimestampSigner(salt="simple_django.accounts.email_verification")
+
+    def make_verification_code(self) -> str:
+        """
+        Return a new verification code. In "signed" mode the code carries the
+        address and its own expiry, in "cache" mode it's a random string that
+        has to be stored in the cache.
+        """
+        if settings.EMAIL_VERIFICATION_CODE_MODE == "signed":
+            return self.get_verification_signer().sign_object(
+                {"id": self.pk, "email": self.email}
+            )
+        return get_random_string(64).lower()
+
+    @classmethod
+    def verify_signed_code(cls, code: str, email: str) -> int:
+        """
+        Return the id of the email address a signed verification code was made
+        for, raising signing.BadSignature if it wasn't made for email or
+        signing.SignatureExpired if it's too old.
+        """
+        payload = cls.get_verification_signer().unsign_object(
+            code, max_age=settings.EMAIL_VERIFICATION_EXPIRY
+        )
+        if payload.get("email") != email:
+            raise signing.BadSignature("Code was made for another email address.")
+        return payload["id"]
+
+    @classmethod
+    def get_expired_code_id(cls, code: str) -> int:
+        """Return the email address id of a signed code regardless of its age."""
+        return cls.get_verification_signer().unsign_object(code)["id"]
+
     def set_verified(self):
         cache.cache.delete(self.email_verification_cache_key)
         self.is_verified = True
@@ -77,34 +214,80 @@ class EmailAddress(models.Model):
 
         return cached_verification_code is None
 
+    def get_verification_email(self, verification_code: str) -> EmailMultiAlternatives:
+        ctx = {
+            "user": self.user,
+            "verification_code": verification_code,
+            "confirmation_url": settings.EMAIL_CONFIRMATION_URL
+            + f"?code={verification_code}",
+        }
+        html_email = render_to_string("accounts/emails/confirm_email_address.html", ctx)
+        text_email = render_to_string("accounts/emails/confirm_email_address.txt", ctx)
+
+        message = EmailMultiAlternatives(
+            subject="Email verification",
+            body=text_email,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[self.email],
+        )
+        message.attach_alternative(html_email, "text/html")
+        return message
+
     def send_verification_email(self):
-        if self.should_send_verification_email():
-            verification_code = get_random_string(64).lower()
-            ctx = {
-                "user": self.user,
-                "verification_code": verification_code,
-                "confirmation_url": settings.EMAIL_CONFIRMATION_URL
-                + f"?code={verification_code}",
-            }
-            html_email = render_to_string(
-                "accounts/emails/confirm_email_address.html", ctx
-            )
-            text_email = render_to_string(
-                "accounts/emails/confirm_email_address.txt", ctx
-            )
+        EmailAddress.send_verification_emails([self])
 
-            send_mail(
-                subject="Email verification",
-                message=text_email,
-                html_message=html_email,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[self.email],
-            )
-            cache.cache.set(
-                self.email_verification_cache_key,
-                verification_code,
-                settings.EMAIL_VERIFICATION_EXPIRY.seconds,
-            )
+    @classmethod
+    def send_verification_emails(cls, email_addresses) -> int:
+        """
+        Send verification emails to the addresses that need one over a single
+        mail connection and return the number of emails sent.
+
+        Select the related users beforehand, the templates render them.
+        """
+        email_addresses = [
+            email_address
+            for email_address in email_addresses
+            if not email_address.is_verified
+        ]
+        cached_verification_codes = cache.cache.get_many(
+            [
+                email_address.email_verification_cache_key
+                for email_address in email_addresses
+            ]
+        )
+
+        verification_codes = {}
+        messages = {}
+        for email_address in email_addresses:
+            key = email_address.email_verification_cache_key
+            if key in cached_verification_codes or key in verification_codes:
+                continue
+            verification_code = email_address.make_verification_code()
+            # Claim the address by storing its code before sending. If another
+            # worker got there first, its code is the one the user will get.
+            # Signed codes aren't looked up but the entry still prevents
+            # sending another email until the code expires.
+            if not cache.cache.add(
+                key, verification_code, settings.EMAIL_VERIFICATION_EXPIRY.seconds
+            ):
+                continue
+            verification_codes[key] = verification_code
+            messages[key] = email_address.get_verification_email(verification_code)
+
+        if not messages:
+            return 0
+
+        sent = set()
+        try:
+            connection = get_connection()
+            with connection:
+                for key, message in messages.items():
+                    if connection.send_messages([message]):
+                        sent.add(key)
+        finally:
+            # Let the next attempt send the ones that weren't sent again.
+            cache.cache.delete_many([key for key in messages if key not in sent])
+        return len(sent)
 
     def __str__(self):
         return self.email
@@ -112,3 +295,38 @@ class EmailAddress(models.Model):
     class Meta:
         db_table = "email_addresses"
         ordering = ["-updated_at"]
+        indexes = [
+            models.Index(fields=["user", "email"]),
+            # For keyset pagination of a user's addresses.
+            models.Index(fields=["user", "-updated_at", "-id"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user"],
+                condition=models.Q(is_primary=True),
+                name="email_addresses_one_primary_per_user",
+            ),
+        ]
+
+
+class OutboxEmail(models.Model):
+    """
+    Verification email waiting to be sent, see simple_django.accounts.outbox.
+    """
+
+    email_address = models.ForeignKey(
+        EmailAddress, on_delete=models.CASCADE, related_name="outbox_emails"
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Verification email to {self.email_address_id}"
+
+    class Meta:
+        db_table = "email_outbox"
+        ordering = ["id"]
+        indexes = [models.Index(fields=["available_at"])]
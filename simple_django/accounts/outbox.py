@@ -0,0 +1,147 @@
+"""
+Transactional outbox for verification emails.
+
+New email addresses get an OutboxEmail row in the transaction that creates
+them, so no email is lost when the broker is down and none is sent for a
+signup that was rolled back. The dispatch_email_outbox task drains the outbox
+in batches, so any number of workers can run it at once without sending an
+email twice.
+
+Batches are claimed in a short transaction with SELECT ... FOR UPDATE SKIP
+LOCKED, which moves their available_at EMAIL_OUTBOX_LEASE ahead and counts the
+attempt, and sent once it has committed, so no locks are held while talking to
+the mail server. Sent entries are then deleted. If the worker dies while
+sending, the entries are due again once the lease runs out.
+
+Batches that fail are retried with exponential backoff until
+EMAIL_OUTBOX_MAX_ATTEMPTS, after which they're left in the table for
+inspection. get_stats() reports the backlog, see the email_outbox_stats
+command.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from simple_django.accounts.models import EmailAddress, OutboxEmail
+from simple_django.accounts.types import OutboxStatsDict
+
+log = logging.getLogger("simple_django.accounts.outbox")
+
+# Results of the last dispatch() by any worker.
+LAST_DISPATCH_KEY = "email_outbox_last_dispatch"
+
+
+def get_retry_delay(attempts: int):
+    delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return min(delay, settings.EMAIL_OUTBOX_MAX_RETRY_DELAY)
+
+
+def get_pending():
+    return OutboxEmail.objects.filter(attempts__lt=settings.EMAIL_OUTBOX_MAX_ATTEMPTS)
+
+
+def claim_batch(batch_size: int, now) -> list:
+    """Lease up to batch_size due entries to this worker and return them."""
+    with transaction.atomic():
+        entries = list(
+            get_pending()
+            .select_for_update(skip_locked=True, of=("self",))
+            .select_related("email_address__user")
+            .filter(available_at__lte=now)
+            .order_by("id")[:batch_size]
+        )
+        if entries:
+            OutboxEmail.objects.filter(pk__in=[entry.pk for entry in entries]).update(
+                attempts=F("attempts") + 1,
+                available_at=now + settings.EMAIL_OUTBOX_LEASE,
+            )
+    for entry in entries:
+        entry.attempts += 1
+    return entries
+
+
+def dispatch_batch(batch_size: int) -> OutboxStatsDict:
+    """Send one batch of emails and return what happened to it."""
+    now = timezone.now()
+    stats: OutboxStatsDict = {"sent": 0, "failed": 0, "lag": 0.0}
+
+    entries = claim_batch(batch_size, now)
+    if not entries:
+        return stats
+
+    stats["lag"] = (now - entries[0].created_at).total_seconds()
+    try:
+        EmailAddress.send_verification_emails(
+            [entry.email_address for entry in entries]
+        )
+    except Exception as e:
+        log.exception("Failed to send %d outbox emails.", len(entries))
+        # Emails that did get sent keep their code and are skipped next time.
+        for entry in entries:
+            entry.available_at = timezone.now() + get_retry_delay(entry.attempts)
+            entry.last_error = repr(e)
+        OutboxEmail.objects.bulk_update(entries, ["available_at", "last_error"])
+        stats["failed"] = len(entries)
+    else:
+        OutboxEmail.objects.filter(pk__in=[entry.pk for entry in entries]).delete()
+        stats["sent"] = len(entries)
+
+    return stats
+
+
+def dispatch(batch_size: int = None, max_batches: int = None) -> OutboxStatsDict:
+    """
+    Send batches until the outbox has nothing left that's due, or max_batches
+    have been sent. Lag is the age of the oldest email sent.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    stats: OutboxStatsDict = {"sent": 0, "failed": 0, "lag": 0.0}
+
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        batch_stats = dispatch_batch(batch_size)
+        stats["sent"] += batch_stats["sent"]
+        stats["failed"] += batch_stats["failed"]
+        stats["lag"] = max(stats["lag"], batch_stats["lag"])
+        batches += 1
+        if batch_stats["sent"] + batch_stats["failed"] < batch_size:
+            break
+
+    cache.set(LAST_DISPATCH_KEY, {**stats, "finished_at": timezone.now()}, None)
+    return stats
+
+
+def get_lag() -> float:
+    """Return the age in seconds of the oldest email waiting to be sent."""
+    oldest = get_pending().aggregate(oldest=Min("created_at"))["oldest"]
+    if oldest is None:
+        return 0.0
+    return (timezone.now() - oldest).total_seconds()
+
+
+def get_stats() -> dict:
+    """
+    Return the number of pending entries, of those that are due, waiting for
+    a retry or a lease to run out, and given up on, the age in seconds of the
+    oldest pending and oldest due entry, and the results of the last dispatch.
+    """
+    now = timezone.now()
+    pending = Q(attempts__lt=settings.EMAIL_OUTBOX_MAX_ATTEMPTS)
+    due = pending & Q(available_at__lte=now)
+    stats = OutboxEmail.objects.aggregate(
+        pending=Count("id", filter=pending),
+        due=Count("id", filter=due),
+        waiting=Count("id", filter=pending & Q(available_at__gt=now)),
+        given_up=Count("id", filter=~pending),
+        oldest=Min("created_at", filter=pending),
+        oldest_due=Min("created_at", filter=due),
+    )
+    oldest, oldest_due = stats.pop("oldest"), stats.pop("oldest_due")
+    stats["lag"] = (now - oldest).total_seconds() if oldest else 0.0
+    stats["due_lag"] = (now - oldest_due).total_seconds() if oldest_due else 0.0
+    stats["last_dispatch"] = cache.get(LAST_DISPATCH_KEY)
+    return stats
@@ -3,8 +3,8 @@ from functools import partial
 from django.contrib.auth import get_user_model
 from django.db import transaction
 
-from simple_django.accounts.models import EmailAddress
-from simple_django.accounts.tasks import send_verification_email
+from simple_django.accounts.api.authentication import delete_cached_user
+from simple_django.accounts.models import EmailAddress, OutboxEmail
 
 User = get_user_model()
 
@@ -25,4 +25,19 @@ def send_verification_email_on_create(*args, **kwargs):
 
     if created:
         instance: EmailAddress = kwargs.get("instance")
-        transaction.on_commit(partial(send_verification_email.delay, instance.id))
+        # Sent by the dispatch_email_outbox task once the transaction commits.
+        OutboxEmail.objects.create(email_address=instance)
+
+
+def invalidate_cached_user(*args, **kwargs):
+    instance: User = kwargs.get("instance")
+    # Deleted before the commit, a concurrent request could cache the old row
+    # again.
+    transaction.on_commit(partial(delete_cached_user, instance.pk))
+
+
+def invalidate_cached_email_address_user(*args, **kwargs):
+    # The user's primary_email_verified column may have been changed by a
+    # database trigger.
+    instance: EmailAddress = kwargs.get("instance")
+    transaction.on_commit(partial(delete_cached_user, instance.user_id))
@@ -1,9 +1,74 @@
 from celery import shared_task
+from django.core.cache import cache
 
+from simple_django.accounts import last_login, outbox
 from simple_django.accounts.models import EmailAddress
 
+# How long an enqueued verification email blocks enqueueing another one for
+# the same address. The claim outlives a successful task, so that triggers
+# arriving just after it ran don't enqueue a task with nothing to send.
+VERIFICATION_EMAIL_TASK_TIMEOUT = 300
+
+
+@shared_task
+def send_verification_emails(email_pks):
+    email_addresses = EmailAddress.objects.select_related("user").filter(
+        pk__in=email_pks
+    )
+    try:
+        EmailAddress.send_verification_emails(email_addresses)
+    except Exception:
+        # Let the addresses be enqueued again.
+        cache.delete_many(
+            [EmailAddress(pk=pk).email_verification_task_cache_key for pk in email_pks]
+        )
+        raise
+
 
 @shared_task
 def send_verification_email(email_pk):
-    email_address = EmailAddress.objects.get(pk=email_pk)
-    email_address.send_verification_email()
+    send_verification_emails(email_pks=[email_pk])
+
+
+def enqueue_verification_email(email_pk) -> bool:
+    """
+    Enqueue a verification email unless one is already on its way to the
+    address. Return whether a task was enqueued.
+    """
+    email_address = EmailAddress(pk=email_pk)
+    if not cache.add(
+        email_address.email_verification_task_cache_key,
+        1,
+        VERIFICATION_EMAIL_TASK_TIMEOUT,
+    ):
+        return False
+    try:
+        send_verification_email.delay(email_pk)
+    except Exception:
+        # Nothing was enqueued, let the next trigger try again.
+        cache.delete(email_address.email_verification_task_cache_key)
+        raise
+    return True
+
+
+@shared_task
+def dispatch_email_outbox():
+    stats = outbox.dispatch()
+    outbox.log.info(
+        "Sent %d outbox emails, %d failed, lag %.1fs, pending lag %.1fs.",
+        stats["sent"],
+        stats["failed"],
+        stats["lag"],
+        outbox.get_lag(),
+    )
+
+
+@shared_task
+def flush_last_login_buffer():
+    # Skip this run if the previous one is still going.
+    if not cache.add(last_login.FLUSH_LOCK_KEY, 1, 300):
+        return
+    try:
+        last_login.flush()
+    finally:
+        cache.delete(last_login.FLUSH_LOCK_KEY)
@@ -0,0 +1,96 @@
+import json
+from unittest import mock
+
+from django.conf import settings
+from django.test import AsyncRequestFactory, TestCase
+from faker import Faker
+
+from simple_django.accounts import google
+from simple_django.accounts.api import async_views
+from simple_django.accounts.models import OutboxEmail, User
+from simple_django.accounts.tests.factories import UserFactory
+
+
+class AsyncAuthViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fake = Faker()
+        cls.fake = fake
+        cls.password = fake.password()
+        cls.user = UserFactory(username=fake.user_name(), password=cls.password)
+        cls.rf = AsyncRequestFactory()
+
+    def post(self, data):
+        return self.rf.post("/", data, content_type="application/json")
+
+    async def test_login_with_email_password(self):
+        request = self.post({"email": self.user.email, "password": self.password})
+        response = await async_views.login_with_email_password(request)
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertIn("access", data)
+        self.assertEqual(data["user"]["email"], self.user.email)
+        self.assertFalse(data["user"]["email_verified"])
+        self.assertIn(settings.REFRESH_TOKEN_COOKIE_NAME, response.cookies)
+
+        request = self.post({"email": self.user.email, "password": "wrong"})
+        response = await async_views.login_with_email_password(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("password", json.loads(response.content))
+
+    async def test_signup_with_email(self):
+        password = self.fake.password()
+        email = "new_user@example.test"
+        data = {
+            "username": "new_user",
+            "email": email,
+            "password": password,
+            "confirm_password": password,
+        }
+        response = await async_views.signup_with_email(self.post(data))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(await User.objects.filter(email=email).aexists())
+
+        data["username"] = "other_user"
+        response = await async_views.signup_with_email(self.post(data))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("email", json.loads(response.content))
+
+    async def test_refresh_access_token(self):
+        tokens = await self.user.aget_auth_tokens()
+        request = self.post({"refresh": tokens["refresh"]})
+        response = await async_views.refresh_access_token(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", json.loads(response.content))
+
+        request = self.post({"refresh": "invalid"})
+        response = await async_views.refresh_access_token(request)
+        self.assertEqual(response.status_code, 401)
+
+    async def test_rejects_other_methods(self):
+        response = await async_views.refresh_access_token(self.rf.get("/"))
+        self.assertEqual(response.status_code, 405)
+
+    async def test_google_signup_atomic(self):
+        profile = {"email": "google_user@example.test"}
+        # Users are saved without a username or password.
+        self.enterContext(mock.patch.object(User, "full_clean"))
+        with mock.patch.object(
+            google, "aget_userinfo", return_value=profile
+        ), mock.patch.object(OutboxEmail.objects, "create", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                await async_views.login_with_google(
+                    self.post({"access_token": "token"})
+                )
+        # The user and their email address were rolled back with the outbox.
+        self.assertFalse(await User.objects.filter(email=profile["email"]).aexists())
+
+        with mock.patch.object(google, "aget_userinfo", return_value=profile):
+            response = await async_views.login_with_google(
+                self.post({"access_token": "token"})
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(await User.objects.filter(email=profile["email"]).aexists())
+
+    async def test_google_client_shared(self):
+        self.assertIs(google.get_async_client(), google.get_async_client())
@@ -0,0 +1,139 @@
+import base64
+from unittest import mock
+
+from django.contrib.auth import hashers
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from faker import Faker
+from rest_framework.exceptions import AuthenticationFailed
+
+from simple_django.accounts.api.authentication import (
+    CachedBasicAuthentication,
+    CachedJWTAuthentication,
+)
+from simple_django.accounts.tests.factories import UserFactory
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fake = Faker()
+        cls.user = UserFactory(username=fake.user_name())
+        cls.rf = RequestFactory()
+
+    def setUp(self):
+        cache.clear()
+        tokens = self.user.get_auth_tokens()
+        self.request = self.rf.get("/", HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+
+    def authenticate(self):
+        user, _ = CachedJWTAuthentication().authenticate(self.request)
+        return user
+
+    def test_user_is_cached(self):
+        with self.assertNumQueries(1):
+            user = self.authenticate()
+        self.assertEqual(user, self.user)
+
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertEqual(user, self.user)
+
+    def test_cached_user_invalidated_on_save(self):
+        self.authenticate()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = "Changed"
+            self.user.save()
+            # Until the transaction commits, others still see the old row.
+            with self.assertNumQueries(0):
+                self.authenticate()
+
+        with self.assertNumQueries(1):
+            user = self.authenticate()
+        self.assertEqual(user.first_name, "Changed")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+
+class CachedBasicAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fake = Faker()
+        cls.fake = fake
+        cls.password = fake.password()
+        cls.user = UserFactory(username=fake.user_name(), password=cls.password)
+        cls.rf = RequestFactory()
+
+    def setUp(self):
+        cache.clear()
+
+    def authenticate(self, password=None):
+        credentials = f"{self.user.username}:{password or self.password}"
+        credentials = base64.b64encode(credentials.encode()).decode()
+        request = self.rf.get("/", HTTP_AUTHORIZATION=f"Basic {credentials}")
+        user, _ = CachedBasicAuthentication().authenticate(request)
+        return user
+
+    def test_credentials_checked_once(self):
+        with mock.patch(
+            "django.contrib.auth.base_user.check_password",
+            wraps=hashers.check_password,
+        ) as check_password:
+            self.assertEqual(self.authenticate(), self.user)
+            with self.assertNumQueries(0):
+                self.assertEqual(self.authenticate(), self.user)
+        check_password.assert_called_once()
+
+        # Wrong passwords aren't remembered.
+        for _ in range(2):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate(self.fake.password())
+
+    def test_password_change_forgets_credentials(self):
+        self.authenticate()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password(self.fake.password())
+            self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_inactive_user_rejected(self):
+        self.authenticate()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+
+class AuthenticationSelectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fake = Faker()
+        cls.password = fake.password()
+        cls.user = UserFactory(username=fake.user_name(), password=cls.password)
+
+    def test_auth_endpoints_skip_authentication(self):
+        credentials = base64.b64encode(f"{self.user.username}:wrong".encode())
+        with mock.patch.object(
+            CachedBasicAuthentication, "authenticate"
+        ) as authenticate:
+            response = self.client.post(
+                reverse("api:accounts:email-password-login"),
+                {"email": self.user.email, "password": self.password},
+                content_type="application/json",
+                HTTP_AUTHORIZATION=f"Basic {credentials.decode()}",
+            )
+        self.assertEqual(response.status_code, 200)
+        authenticate.assert_not_called()
@@ -0,0 +1,107 @@
+import json
+import time
+from unittest import mock
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.test import TestCase
+from faker import Faker
+
+from simple_django.accounts import google
+from simple_django.accounts.api.serializers import LoginWithGoogleSerializer
+from simple_django.accounts.tests.factories import UserFactory
+
+CLIENT_ID = "client-id.apps.googleusercontent.com"
+
+
+class FakeResponse:
+    def __init__(self, data, headers=None):
+        self.data = data
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class GoogleIdTokenTests(TestCase):
+    """Verify ID tokens against a stand-in key set instead of Google's."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fake = Faker()
+        cls.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        jwk = json.loads(
+            jwt.algorithms.RSAAlgorithm.to_jwk(cls.private_key.public_key())
+        )
+        cls.jwks = {"keys": [{**jwk, "kid": "test-key", "alg": "RS256", "use": "sig"}]}
+
+    def setUp(self):
+        google.clear_signing_keys()
+        self.addCleanup(google.clear_signing_keys)
+        patcher = mock.patch.object(
+            google.session,
+            "get",
+            return_value=FakeResponse(
+                self.jwks, {"Cache-Control": "public, max-age=600"}
+            ),
+        )
+        self.get = patcher.start()
+        self.addCleanup(patcher.stop)
+        settings_override = self.settings(GOOGLE_CLIENT_IDS=[CLIENT_ID])
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def make_id_token(self, kid="test-key", **claims):
+        payload = {
+            "iss": "https://accounts.google.com",
+            "aud": CLIENT_ID,
+            "exp": int(time.time()) + 300,
+            "email": self.fake.email(),
+            "email_verified": True,
+            "given_name": self.fake.first_name(),
+            "family_name": self.fake.last_name(),
+            **claims,
+        }
+        return jwt.encode(
+            payload, self.private_key, algorithm="RS256", headers={"kid": kid}
+        )
+
+    def test_verify_id_token(self):
+        id_token = self.make_id_token()
+        claims = google.verify_id_token(id_token)
+        self.assertIn("email", claims)
+
+        # The key set is only downloaded once.
+        google.verify_id_token(self.make_id_token())
+        self.assertEqual(self.get.call_count, 1)
+
+    def test_rejects_invalid_tokens(self):
+        invalid_tokens = [
+            self.make_id_token(aud="other-client-id"),
+            self.make_id_token(iss="https://evil.example.com"),
+            self.make_id_token(exp=int(time.time()) - 300),
+            self.make_id_token(email_verified=False),
+            self.make_id_token(kid="unknown-key"),
+        ]
+        for id_token in invalid_tokens:
+            with self.subTest(id_token=id_token):
+                with self.assertRaises(google.GoogleTokenError):
+                    google.verify_id_token(id_token)
+
+        # The keys were only just downloaded so the unknown key id didn't force
+        # another download.
+        self.assertEqual(self.get.call_count, 1)
+
+    def test_login_with_id_token(self):
+        user = UserFactory(username=self.fake.user_name())
+        serializer = LoginWithGoogleSerializer(
+            data={"id_token": self.make_id_token(email=user.email)}
+        )
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data["user"], user)
+
+        serializer = LoginWithGoogleSerializer(data={})
+        self.assertFalse(serializer.is_valid())
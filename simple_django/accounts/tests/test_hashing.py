@@ -0,0 +1,101 @@
+import json
+import tempfile
+import threading
+from pathlib import Path
+
+from django.test import TestCase
+from django.urls import reverse
+from faker import Faker
+
+from simple_django.accounts import hashers, hashing
+from simple_django.accounts.tests.factories import UserFactory
+
+
+class PasswordHashingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fake = Faker()
+        cls.fake = fake
+        cls.password = fake.password()
+        cls.user = UserFactory(username=fake.user_name(), password=cls.password)
+
+    def tearDown(self):
+        hashing.shutdown()
+
+    def block_hashing_pool(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        thread = threading.Thread(target=hashing.run, args=(block,))
+        thread.start()
+        started.wait(5)
+        return release, thread
+
+    def test_check_password(self):
+        self.assertTrue(hashing.check_password(self.user, self.password))
+        self.assertFalse(hashing.check_password(self.user, self.fake.password()))
+
+    def test_check_password_upgrades_calibrated_hash(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            parameters_file = Path(tmp_dir) / "password_hashers.json"
+            with self.settings(
+                PASSWORD_HASHERS=[
+                    "simple_django.accounts.hashers.CalibratedPBKDF2PasswordHasher"
+                ],
+                PASSWORD_HASHERS_PARAMETERS_FILE=parameters_file,
+            ):
+                parameters_file.write_text(
+                    json.dumps({"pbkdf2_sha256": {"iterations": 1000}})
+                )
+                hashers.load_parameters.cache_clear()
+                hashing.set_password(self.user, self.password)
+                self.user.save()
+
+                parameters_file.write_text(
+                    json.dumps({"pbkdf2_sha256": {"iterations": 2000}})
+                )
+                hashers.load_parameters.cache_clear()
+
+                self.assertIn("$1000$", self.user.password)
+                self.assertTrue(hashing.check_password(self.user, self.password))
+                self.user.refresh_from_db()
+                self.assertIn("$2000$", self.user.password)
+            hashers.load_parameters.cache_clear()
+
+    def test_rejects_when_queue_full(self):
+        with self.settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE_SIZE=0):
+            hashing.shutdown()
+            release, thread = self.block_hashing_pool()
+            try:
+                with self.assertRaises(hashing.PasswordHashingUnavailable):
+                    hashing.check_password(self.user, self.password)
+            finally:
+                release.set()
+                thread.join()
+
+            self.assertTrue(hashing.check_password(self.user, self.password))
+
+    def test_login_returns_503_when_queue_full(self):
+        with self.settings(
+            PASSWORD_HASHING_WORKERS=1,
+            PASSWORD_HASHING_QUEUE_SIZE=0,
+            PASSWORD_HASHING_RETRY_AFTER=3,
+        ):
+            hashing.shutdown()
+            release, thread = self.block_hashing_pool()
+            try:
+                response = self.client.post(
+                    reverse("api:accounts:email-password-login"),
+                    {"email": self.user.email, "password": self.password},
+                    content_type="application/json",
+                )
+            finally:
+                release.set()
+                thread.join()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "3")
@@ -0,0 +1,98 @@
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, tag
+from faker import Faker
+
+from simple_django.accounts.models import EmailAddress, User
+from simple_django.accounts.tests.factories import UserFactory
+
+ROWS = 1_000_000
+
+CREATE_USERS = """
+INSERT INTO users (
+    username, email, password, first_name, last_name, is_superuser, is_staff,
+    is_active, date_joined, primary_email_verified
+)
+SELECT 'user' || i, 'user' || i || '@example.com', '', '', '', false, false,
+    true, now(), false
+FROM generate_series(1, %s) AS i
+"""
+
+CREATE_EMAIL_ADDRESSES = """
+INSERT INTO email_addresses (
+    user_id, email, is_primary, is_verified, created_at, updated_at
+)
+SELECT id, email, true, false, now(), now() FROM users
+UNION ALL
+SELECT id, 'other.' || email, false, false, now(), now() FROM users
+"""
+
+
+# Loading the rows takes a while, only run with --tag slow.
+@tag("slow")
+class EmailIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        with connection.cursor() as cursor:
+            # Skip the triggers keeping primary_email_verified in sync, none
+            # of the addresses are verified.
+            cursor.execute("ALTER TABLE users DISABLE TRIGGER USER")
+            cursor.execute("ALTER TABLE email_addresses DISABLE TRIGGER USER")
+            cursor.execute(CREATE_USERS, [ROWS])
+            cursor.execute(CREATE_EMAIL_ADDRESSES)
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            cursor.execute("ALTER TABLE users ENABLE TRIGGER USER")
+            cursor.execute("ALTER TABLE email_addresses ENABLE TRIGGER USER")
+            cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+            cursor.execute("ANALYZE users, email_addresses")
+        cls.user = User.objects.get(username=f"user{ROWS // 2}")
+
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(index, plan)
+        self.assertNotIn("Seq Scan", plan)
+
+    def test_email_lookup_ignores_case(self):
+        queryset = User.objects.with_email(self.user.email.upper())
+        self.assertEqual(queryset.get(), self.user)
+        self.assertUsesIndex(queryset, "users_email_upper_uniq")
+
+    def test_email_address_lookup(self):
+        queryset = self.user.email_addresses.filter(email=self.user.email)
+        self.assertEqual(queryset.get().email, self.user.email)
+        self.assertUsesIndex(queryset, "email_addre_user_id_8ce514_idx")
+
+    def test_primary_email_address_lookup(self):
+        # As run by EmailAddressManager.primary(), get() drops Meta.ordering,
+        # which the (user, -updated_at, -id) index would satisfy instead.
+        queryset = self.user.email_addresses.filter(is_primary=True).order_by()
+        self.assertEqual(queryset.get().email, self.user.email)
+        self.assertEqual(self.user.email_addresses.primary().email, self.user.email)
+        self.assertUsesIndex(queryset, "email_addresses_one_primary_per_user")
+
+
+class EmailConstraintTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.fake = Faker()
+        cls.user = UserFactory(username=cls.fake.user_name())
+
+    def test_email_unique_ignoring_case(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            UserFactory(username=self.fake.user_name(), email=self.user.email.upper())
+
+        # Users without an email address are fine.
+        UserFactory(username=self.fake.user_name(), email="")
+        UserFactory(username=self.fake.user_name(), email="")
+
+    def test_one_primary_email_address(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            EmailAddress.objects.create(
+                user=self.user, email=self.fake.email(), is_primary=True
+            )
+
+        email_address = EmailAddress.objects.create(
+            user=self.user, email=self.fake.email()
+        )
+        email_address.set_as_primary()
+        self.assertEqual(self.user.email_addresses.primary(), email_address)
+        self.assertEqual(User.objects.get(pk=self.user.pk).email, email_address.email)
@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from faker import Faker
+
+from simple_django.accounts import last_login
+from simple_django.accounts.tasks import flush_last_login_buffer
+from simple_django.accounts.tests.factories import UserFactory
+
+
+class LastLoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fake = Faker()
+        cls.users = [UserFactory(username=fake.user_name()) for _ in range(3)]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_exact_mode_updates_row(self):
+        user = self.users[0]
+        with self.settings(LAST_LOGIN_UPDATE_MODE="exact"):
+            with self.assertNumQueries(1):
+                user.update_login_timestamp()
+        user.refresh_from_db()
+        self.assertIsNotNone(user.last_login)
+
+    def test_buffered_mode_defers_update(self):
+        with self.settings(LAST_LOGIN_UPDATE_MODE="buffered"):
+            with self.assertNumQueries(0):
+                for user in self.users:
+                    user.get_auth_tokens()
+                self.users[0].update_login_timestamp()
+            expected = self.users[0].last_login
+
+            for user in self.users:
+                user.refresh_from_db()
+                self.assertIsNone(user.last_login)
+
+            # The first user's second login lands in the second batch.
+            with self.assertNumQueries(2):
+                self.assertEqual(last_login.flush(batch_size=2), 4)
+
+        for user in self.users:
+            user.refresh_from_db()
+            self.assertIsNotNone(user.last_login)
+        self.assertEqual(self.users[0].last_login, expected)
+
+        # Everything has been flushed.
+        self.assertEqual(last_login.flush(), 0)
+
+    def test_flush_keeps_most_recent_login(self):
+        user = self.users[0]
+        now = timezone.now()
+        last_login.record(user.pk, now)
+        last_login.record(user.pk, now - timedelta(hours=1))
+        flush_last_login_buffer()
+        user.refresh_from_db()
+        self.assertEqual(user.last_login, now)
+
+        last_login.record(user.pk, now - timedelta(days=1))
+        flush_last_login_buffer()
+        user.refresh_from_db()
+        self.assertEqual(user.last_login, now)
+
+    def test_flush_stops_at_unwritten_slot(self):
+        user = self.users[0]
+        now = timezone.now()
+        last_login.record(user.pk, now - timedelta(hours=1))
+        # A login between taking its slot number and writing the slot.
+        cache.incr(last_login.SEQUENCE_KEY)
+        last_login.record(user.pk, now)
+
+        self.assertEqual(last_login.flush(), 1)
+        user.refresh_from_db()
+        self.assertEqual(user.last_login, now - timedelta(hours=1))
+        self.assertIsNotNone(cache.get(last_login.get_slot_key(3)))
+
+        cache.set(last_login.get_slot_key(2), (user.pk, now - timedelta(minutes=1)))
+        self.assertEqual(last_login.flush(), 1)
+        user.refresh_from_db()
+        self.assertEqual(user.last_login, now)
+
+    def test_flush_skips_lost_slot(self):
+        user = self.users[0]
+        now = timezone.now()
+        cache.add(last_login.SEQUENCE_KEY, 0, None)
+        cache.incr(last_login.SEQUENCE_KEY)
+        last_login.record(user.pk, now)
+        self.assertEqual(last_login.flush(), 0)
+
+        # Still missing a flush later, the slot was lost.
+        self.assertEqual(last_login.flush(), 1)
+        user.refresh_from_db()
+        self.assertEqual(user.last_login, now)
+        self.assertEqual(last_login.flush(), 0)
@@ -0,0 +1,40 @@
+from django.test import TestCase
+from faker import Faker
+
+from simple_django.accounts.models import EmailAddress, User
+from simple_django.accounts.tests.factories import UserFactory
+
+
+class UserTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fake = Faker()
+        cls.fake = fake
+        cls.user = UserFactory(username=fake.user_name())
+
+    def test_primary_email_verified_trigger(self):
+        email_address = self.user.email_addresses.primary()
+        self.assertFalse(User.objects.get(pk=self.user.pk).email_verified)
+
+        email_address.set_verified()
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(user.email_verified)
+
+        # Saving a stale instance doesn't overwrite the column.
+        self.user.first_name = self.fake.first_name()
+        self.user.save()
+        self.assertTrue(User.objects.get(pk=self.user.pk).email_verified)
+
+        other_email_address = EmailAddress.objects.create(
+            user=self.user, email=self.fake.email()
+        )
+        EmailAddress.objects.filter(pk=email_address.pk).update(is_primary=False)
+        self.assertFalse(User.objects.get(pk=self.user.pk).email_verified)
+
+        other_email_address.is_verified = True
+        other_email_address.set_as_primary()
+        self.assertTrue(User.objects.get(pk=self.user.pk).email_verified)
+
+        other_email_address.delete()
+        self.assertFalse(User.objects.get(pk=self.user.pk).email_verified)
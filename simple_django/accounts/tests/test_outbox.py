@@ -0,0 +1,146 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from faker import Faker
+
+from simple_django.accounts import models, outbox
+from simple_django.accounts.models import OutboxEmail
+from simple_django.accounts.tests.factories import UserFactory
+
+
+class OutboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fake = Faker()
+        for _ in range(5):
+            UserFactory(username=fake.unique.user_name())
+
+    def setUp(self):
+        cache.clear()
+
+    def test_signup_adds_to_outbox(self):
+        self.assertEqual(OutboxEmail.objects.count(), 5)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_dispatch_in_batches(self):
+        stats = outbox.dispatch(batch_size=2)
+        self.assertEqual(stats["sent"], 5)
+        self.assertEqual(stats["failed"], 0)
+        self.assertGreaterEqual(stats["lag"], 0)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertFalse(OutboxEmail.objects.exists())
+        self.assertEqual(outbox.get_lag(), 0)
+
+    def test_failed_batch_retried_with_backoff(self):
+        with mock.patch.object(models, "get_connection") as get_connection:
+            get_connection.return_value.send_messages.side_effect = OSError
+            stats = outbox.dispatch()
+            self.assertEqual(stats["failed"], 5)
+
+            # Not due again yet.
+            self.assertEqual(outbox.dispatch()["failed"], 0)
+
+        entry = OutboxEmail.objects.first()
+        self.assertEqual(entry.attempts, 1)
+        self.assertIn("OSError", entry.last_error)
+        self.assertGreater(entry.available_at, timezone.now())
+        self.assertEqual(outbox.get_retry_delay(1), timedelta(seconds=30))
+        self.assertEqual(outbox.get_retry_delay(20), timedelta(hours=1))
+
+        OutboxEmail.objects.update(available_at=timezone.now())
+        self.assertEqual(outbox.dispatch()["sent"], 5)
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_gives_up_after_max_attempts(self):
+        OutboxEmail.objects.update(attempts=10)
+        with self.settings(EMAIL_OUTBOX_MAX_ATTEMPTS=10):
+            self.assertEqual(outbox.dispatch()["sent"], 0)
+            self.assertEqual(outbox.get_lag(), 0)
+        self.assertEqual(OutboxEmail.objects.count(), 5)
+
+    def test_claimed_entries_leased(self):
+        now = timezone.now()
+        # A worker that died after claiming two entries.
+        self.assertEqual(len(outbox.claim_batch(2, now)), 2)
+        self.assertEqual(outbox.dispatch()["sent"], 3)
+
+        entry = OutboxEmail.objects.first()
+        self.assertEqual(entry.attempts, 1)
+        self.assertEqual(entry.available_at, now + timedelta(minutes=5))
+
+        OutboxEmail.objects.update(available_at=timezone.now())
+        self.assertEqual(outbox.dispatch()["sent"], 2)
+
+    def test_stats(self):
+        OutboxEmail.objects.filter(pk=OutboxEmail.objects.values("pk")[:1]).update(
+            attempts=10
+        )
+        OutboxEmail.objects.filter(
+            pk=OutboxEmail.objects.order_by("-pk").values("pk")[:1]
+        ).update(available_at=timezone.now() + timedelta(minutes=1))
+
+        stats = outbox.get_stats()
+        self.assertEqual(stats["pending"], 4)
+        self.assertEqual(stats["due"], 3)
+        self.assertEqual(stats["waiting"], 1)
+        self.assertEqual(stats["given_up"], 1)
+        self.assertGreaterEqual(stats["lag"], stats["due_lag"])
+        self.assertIsNone(stats["last_dispatch"])
+
+        outbox.dispatch()
+        stats = outbox.get_stats()
+        self.assertEqual(stats["due"], 0)
+        self.assertEqual(stats["due_lag"], 0)
+        self.assertEqual(stats["last_dispatch"]["sent"], 3)
+
+
+class ConcurrentOutboxTests(TransactionTestCase):
+    def setUp(self):
+        fake = Faker()
+        for _ in range(4):
+            UserFactory(username=fake.unique.user_name())
+        cache.clear()
+
+    def test_locked_entries_skipped(self):
+        locked = threading.Event()
+        release = threading.Event()
+        first = OutboxEmail.objects.order_by("id").first()
+
+        def hold_lock():
+            try:
+                with transaction.atomic():
+                    OutboxEmail.objects.select_for_update().get(pk=first.pk)
+                    locked.set()
+                    release.wait(5)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+        locked.wait(5)
+        try:
+            self.assertEqual(outbox.dispatch()["sent"], 3)
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual(list(OutboxEmail.objects.all()), [first])
+        self.assertEqual(outbox.dispatch()["sent"], 1)
+
+    def test_sent_outside_transaction(self):
+        def send_verification_emails(email_addresses):
+            self.assertFalse(connection.in_atomic_block)
+            return len(email_addresses)
+
+        with mock.patch.object(
+            models.EmailAddress,
+            "send_verification_emails",
+            side_effect=send_verification_emails,
+        ):
+            self.assertEqual(outbox.dispatch()["sent"], 4)
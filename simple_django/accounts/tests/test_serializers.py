@@ -0,0 +1,205 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from faker import Faker
+from rest_framework.exceptions import ValidationError
+
+from simple_django.accounts import tasks
+from simple_django.accounts.api.authentication import get_cached_user, set_cached_user
+from simple_django.accounts.api.serializers import (
+    EmailPasswordLoginSerializer,
+    EmailSignupSerializer,
+    EmailVerificationSerializer,
+    UserSerializer,
+)
+from simple_django.accounts.models import EmailAddress, OutboxEmail, User
+from simple_django.accounts.tests.factories import UserFactory
+
+
+class UserSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create(
+            User(username=f"user{i}", email=f"user{i}@example.com") for i in range(1000)
+        )
+        EmailAddress.objects.bulk_create(
+            EmailAddress(
+                user=user, email=user.email, is_primary=True, is_verified=i % 2 == 0
+            )
+            for i, user in enumerate(users)
+        )
+
+    def test_email_verified_query_count(self):
+        with self.assertNumQueries(1):
+            data = UserSerializer(User.objects.all(), many=True).data
+
+        self.assertEqual(len(data), 1000)
+        verified = {user["email"]: user["email_verified"] for user in data}
+        self.assertTrue(verified["user0@example.com"])
+        self.assertFalse(verified["user1@example.com"])
+
+
+class EmailSignupSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fake = Faker()
+        cls.fake = fake
+        # Fixed values, random ones could collide with each other.
+        cls.user = UserFactory(username="existing", email="existing@example.test")
+
+    def get_serializer(self, username="new_user", email="new_user@example.test"):
+        password = self.fake.password()
+        return EmailSignupSerializer(
+            data={
+                "username": username,
+                "email": email,
+                "password": password,
+                "confirm_password": password,
+            }
+        )
+
+    def test_signup_query_count(self):
+        serializer = self.get_serializer()
+        # A single INSERT of the user, email address and outbox email, in a
+        # savepoint.
+        with self.assertNumQueries(3):
+            self.assertTrue(serializer.is_valid())
+            data = serializer.save()
+
+        user = User.objects.get(email=serializer.validated_data["email"])
+        self.assertIn("access", data["tokens"])
+        self.assertIsNotNone(user.last_login)
+        email_address = user.email_addresses.primary()
+        self.assertEqual(email_address.email, user.email)
+        self.assertTrue(
+            OutboxEmail.objects.filter(email_address=email_address).exists()
+        )
+
+    def test_taken_username_and_email(self):
+        cases = [
+            ("username", self.get_serializer(username=self.user.username)),
+            ("email", self.get_serializer(email=self.user.email.upper())),
+        ]
+        for field, serializer in cases:
+            with self.subTest(field):
+                self.assertTrue(serializer.is_valid())
+                with self.assertRaises(ValidationError) as cm:
+                    serializer.save()
+                self.assertIn(field, cm.exception.detail)
+
+        # The transaction is still usable.
+        self.assertEqual(User.objects.count(), 1)
+
+
+class EmailPasswordLoginSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fake = Faker()
+        cls.fake = fake
+        cls.password = fake.password()
+        cls.user = UserFactory(username=fake.user_name(), password=cls.password)
+
+    def test_login_success_query_count(self):
+        serializer = EmailPasswordLoginSerializer(
+            data={"email": self.user.email, "password": self.password}
+        )
+        # SELECT user, UPDATE last_login.
+        with self.assertNumQueries(2):
+            self.assertTrue(serializer.is_valid())
+            data = serializer.save()
+
+        self.assertIn("access", data["tokens"])
+        self.assertEqual(data["user"]["email"], self.user.email)
+
+    def test_login_wrong_password_query_count(self):
+        serializer = EmailPasswordLoginSerializer(
+            data={"email": self.user.email, "password": self.fake.password()}
+        )
+        with self.assertNumQueries(1):
+            self.assertFalse(serializer.is_valid())
+        self.assertIn("password", serializer.errors)
+
+    def test_login_unknown_email_query_count(self):
+        serializer = EmailPasswordLoginSerializer(
+            data={"email": self.fake.email(), "password": self.password}
+        )
+        with self.assertNumQueries(1):
+            self.assertFalse(serializer.is_valid())
+        self.assertIn("email", serializer.errors)
+
+
+class EmailVerificationSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fake = Faker()
+        cls.fake = fake
+        cls.user = UserFactory(username=fake.user_name())
+        cls.email_address = cls.user.email_addresses.primary()
+
+    def setUp(self):
+        cache.clear()
+
+    def get_serializer(self, code, email=None, user=None):
+        return EmailVerificationSerializer(
+            data={"email": email or self.email_address.email, "code": code},
+            context={"request": mock.Mock(user=user or self.user)},
+        )
+
+    def test_signed_code_verified_with_one_update(self):
+        serializer = self.get_serializer(self.email_address.make_verification_code())
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid())
+            serializer.save()
+
+        self.email_address.refresh_from_db()
+        self.assertTrue(self.email_address.is_verified)
+        self.assertTrue(User.objects.get(pk=self.user.pk).email_verified)
+
+    def test_cached_user_deleted_on_commit(self):
+        set_cached_user(self.user)
+        serializer = self.get_serializer(self.email_address.make_verification_code())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(serializer.is_valid())
+            serializer.save()
+            self.assertIsNotNone(get_cached_user(self.user.pk))
+        self.assertIsNone(get_cached_user(self.user.pk))
+
+    def test_signed_code_rejected(self):
+        code = self.email_address.make_verification_code()
+        self.assertFalse(self.get_serializer(code[:-1] + "x").is_valid())
+        self.assertFalse(self.get_serializer(code, email=self.fake.email()).is_valid())
+
+        # Valid codes only verify addresses of the authenticated user.
+        other_user = UserFactory(username=self.fake.user_name())
+        serializer = self.get_serializer(code, user=other_user)
+        self.assertTrue(serializer.is_valid())
+        with self.assertRaises(ValidationError):
+            serializer.save()
+        self.email_address.refresh_from_db()
+        self.assertFalse(self.email_address.is_verified)
+
+    def test_expired_signed_code_sends_new_one(self):
+        code = self.email_address.make_verification_code()
+        with self.settings(EMAIL_VERIFICATION_EXPIRY=timedelta(seconds=-1)):
+            with mock.patch.object(tasks.send_verification_email, "delay") as delay:
+                serializer = self.get_serializer(code)
+                self.assertFalse(serializer.is_valid())
+
+        self.assertIn("expired", str(serializer.errors["code"][0]))
+        delay.assert_called_once_with(self.email_address.pk)
+
+    def test_cache_mode(self):
+        with self.settings(EMAIL_VERIFICATION_CODE_MODE="cache"):
+            code = self.email_address.make_verification_code()
+            cache.set(self.email_address.email_verification_cache_key, code)
+            self.assertFalse(self.get_serializer(code[::-1]).is_valid())
+
+            serializer = self.get_serializer(code)
+            self.assertTrue(serializer.is_valid())
+            serializer.save()
+
+        self.email_address.refresh_from_db()
+        self.assertTrue(self.email_address.is_verified)
+        self.assertIsNone(cache.get(self.email_address.email_verification_cache_key))
@@ -0,0 +1,132 @@
+import smtplib
+import threading
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends import locmem
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from faker import Faker
+from kombu.exceptions import OperationalError
+
+from simple_django.accounts import models, tasks
+from simple_django.accounts.models import EmailAddress
+from simple_django.accounts.tests.factories import UserFactory
+
+
+class SendVerificationEmailsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fake = Faker()
+        for _ in range(20):
+            UserFactory(username=fake.unique.user_name())
+        cls.email_pks = list(EmailAddress.objects.values_list("pk", flat=True))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_batch_uses_one_query_and_connection(self):
+        with mock.patch.object(
+            models, "get_connection", wraps=models.get_connection
+        ) as get_connection, self.assertNumQueries(1):
+            tasks.send_verification_emails(self.email_pks)
+
+        get_connection.assert_called_once()
+        self.assertEqual(len(mail.outbox), 20)
+        email_address = EmailAddress.objects.get(pk=self.email_pks[0])
+        code = cache.get(email_address.email_verification_cache_key)
+        message = next(m for m in mail.outbox if m.to == [email_address.email])
+        self.assertIn(code, message.body)
+        self.assertIn(code, message.alternatives[0][0])
+
+        # Pending codes aren't sent again.
+        tasks.send_verification_emails(self.email_pks)
+        tasks.send_verification_email(self.email_pks[0])
+        self.assertEqual(len(mail.outbox), 20)
+
+    def test_verified_addresses_skipped(self):
+        EmailAddress.objects.filter(pk=self.email_pks[0]).update(is_verified=True)
+        tasks.send_verification_email(self.email_pks[0])
+        self.assertEqual(len(mail.outbox), 0)
+
+        tasks.send_verification_email(self.email_pks[1])
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_codes_of_unsent_emails_deleted(self):
+        class FailingBackend(locmem.EmailBackend):
+            def send_messages(self, messages):
+                if len(mail.outbox) == 2:
+                    raise smtplib.SMTPServerDisconnected()
+                return super().send_messages(messages)
+
+        email_addresses = EmailAddress.objects.filter(pk__in=self.email_pks[:4])
+        with mock.patch.object(
+            models, "get_connection", return_value=FailingBackend()
+        ), self.assertRaises(smtplib.SMTPException):
+            tasks.send_verification_emails(self.email_pks[:4])
+
+        # Codes of delivered emails are kept, the others can be sent again.
+        sent = {message.to[0] for message in mail.outbox}
+        self.assertEqual(len(sent), 2)
+        for email_address in email_addresses:
+            code = cache.get(email_address.email_verification_cache_key)
+            self.assertEqual(code is not None, email_address.email in sent)
+        with mock.patch.object(tasks.send_verification_email, "delay"):
+            self.assertTrue(tasks.enqueue_verification_email(self.email_pks[0]))
+
+    def test_claim_released_when_enqueueing_fails(self):
+        with mock.patch.object(
+            tasks.send_verification_email,
+            "delay",
+            side_effect=OperationalError("Broker unavailable"),
+        ), self.assertRaises(OperationalError):
+            tasks.enqueue_verification_email(self.email_pks[0])
+
+        with mock.patch.object(tasks.send_verification_email, "delay") as delay:
+            self.assertTrue(tasks.enqueue_verification_email(self.email_pks[0]))
+        delay.assert_called_once_with(self.email_pks[0])
+
+
+class ConcurrentVerificationEmailTests(TransactionTestCase):
+    def setUp(self):
+        # Run tasks in the thread that enqueues them.
+        self.delay = self.enterContext(
+            mock.patch.object(
+                tasks.send_verification_email,
+                "delay",
+                side_effect=tasks.send_verification_email,
+            )
+        )
+        UserFactory(username=Faker().user_name())
+        self.email_address = EmailAddress.objects.get()
+        cache.clear()
+        mail.outbox = []
+        self.delay.reset_mock()
+
+    def run_concurrently(self, target, threads=10):
+        barrier = threading.Barrier(threads)
+
+        def worker():
+            try:
+                barrier.wait()
+                target(self.email_address.pk)
+            finally:
+                connection.close()
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+
+    def test_concurrent_triggers_send_once(self):
+        self.run_concurrently(tasks.enqueue_verification_email)
+        self.delay.assert_called_once_with(self.email_address.pk)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_concurrent_workers_send_once(self):
+        self.run_concurrently(tasks.send_verification_email)
+        self.assertEqual(len(mail.outbox), 1)
+        code = cache.get(self.email_address.email_verification_cache_key)
+        self.assertIn(code, mail.outbox[0].body)
@@ -0,0 +1,87 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from faker import Faker
+
+from simple_django.accounts.api.throttling import SlidingWindowRateThrottle
+from simple_django.accounts.tests.factories import UserFactory
+
+RATES = {
+    "auth_ip": "100/min",
+    "auth_email": "2/min",
+    "email_verification_user": "2/min",
+}
+
+
+class AuthThrottlingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fake = Faker()
+        cls.fake = fake
+        cls.password = fake.password()
+        cls.user = UserFactory(username=fake.user_name(), password=cls.password)
+
+    def setUp(self):
+        cache.clear()
+        self.enterContext(
+            self.settings(REST_FRAMEWORK={"DEFAULT_THROTTLE_RATES": RATES})
+        )
+
+    def login(self, email):
+        return self.client.post(
+            reverse("api:accounts:email-password-login"),
+            {"email": email, "password": self.password},
+            content_type="application/json",
+        )
+
+    def test_login_throttled_per_email(self):
+        for _ in range(2):
+            self.assertEqual(self.login(self.user.email).status_code, 200)
+
+        response = self.login(self.user.email.upper())
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+
+        # Other accounts aren't affected.
+        self.assertEqual(self.login(self.fake.email()).status_code, 400)
+
+    def test_previous_window_counts_towards_rate(self):
+        throttle = SlidingWindowRateThrottle
+        with mock.patch.object(throttle, "timer", return_value=60 * 1000):
+            for _ in range(2):
+                self.assertEqual(self.login(self.user.email).status_code, 200)
+
+        # Half way through the next window, half of the previous one counts.
+        with mock.patch.object(throttle, "timer", return_value=60 * 1000 + 90):
+            self.assertEqual(self.login(self.user.email).status_code, 200)
+            self.assertEqual(self.login(self.user.email).status_code, 429)
+
+    def test_non_object_body(self):
+        for data in [[self.user.email], "email", 1]:
+            response = self.client.post(
+                reverse("api:accounts:email-password-login"),
+                data,
+                content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_login_throttled_per_ip(self):
+        rates = {**RATES, "auth_ip": "2/min", "auth_email": "100/min"}
+        self.enterContext(
+            self.settings(
+                REST_FRAMEWORK={"DEFAULT_THROTTLE_RATES": rates, "NUM_PROXIES": 0}
+            )
+        )
+        for _ in range(2):
+            self.assertEqual(self.login(self.user.email).status_code, 200)
+
+        # A client can't pick its own address with X-Forwarded-For.
+        response = self.client.post(
+            reverse("api:accounts:email-password-login"),
+            {"email": self.user.email, "password": self.password},
+            content_type="application/json",
+            HTTP_X_FORWARDED_FOR=self.fake.ipv4(),
+        )
+        self.assertEqual(response.status_code, 429)
@@ -1,3 +1,7 @@
 from typing import TypedDict
 
 UserAuthTokensDict = TypedDict("UserAuthTokensDict", {"refresh": str, "access": str})
+
+OutboxStatsDict = TypedDict(
+    "OutboxStatsDict", {"sent": int, "failed": int, "lag": float}
+)
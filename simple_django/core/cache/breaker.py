@@ -0,0 +1,176 @@
+"""
+Cache backend that stops using a failing cache until it recovers.
+
+Calls go to the PRIMARY cache while it works. Errors are answered from the
+FALLBACK cache, usually a LocMemCache, and after FAILURE_THRESHOLD errors in a
+row the circuit opens: calls go straight to the fallback without waiting for
+the primary to time out, while a background thread probes the primary every
+PROBE_INTERVAL seconds and closes the circuit once it answers again.
+
+Entries written while the circuit is open only live in the fallback, so they
+are per process and are lost when the primary comes back. Locks taken with
+add() only hold within a process in the meantime.
+
+    CACHES = {
+        "memcached": {
+            "BACKEND": "simple_django.core.cache.breaker.CircuitBreakerCache",
+            "LOCATION": "memcached",
+            "OPTIONS": {"PRIMARY": "memcached_nodes", "FALLBACK": "local"},
+        },
+        ...
+    }
+"""
+import logging
+import threading
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+log = logging.getLogger("simple_django.core.cache.breaker")
+
+PROBE_KEY = "circuit_breaker_probe"
+
+_circuits = {}
+_circuits_lock = threading.Lock()
+
+
+class Circuit:
+    """State of a breaker, shared by every thread of the process."""
+
+    def __init__(self, name, options):
+        self.name = name
+        self.primary = options["PRIMARY"]
+        self.fallback = options["FALLBACK"]
+        self.failure_threshold = options.get("FAILURE_THRESHOLD", 3)
+        self.probe_interval = options.get("PROBE_INTERVAL", 5)
+
+        self.lock = threading.Lock()
+        self.is_open = False
+        self.failures = 0
+        self.stats = dict.fromkeys(["errors", "fallbacks", "opened", "closed"], 0)
+        self.closing = threading.Event()
+
+    def record_success(self):
+        if self.failures:
+            with self.lock:
+                self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.stats["errors"] += 1
+            if self.is_open or self.failures < self.failure_threshold:
+                return
+            self.is_open = True
+            self.stats["opened"] += 1
+            self.closing = threading.Event()
+
+        log.error("Cache %s is failing, using %s.", self.primary, self.fallback)
+        threading.Thread(
+            target=self.probe,
+            args=(self.closing,),
+            name=f"cache-probe-{self.name}",
+            daemon=True,
+        ).start()
+
+    def probe(self, closing):
+        while not closing.wait(self.probe_interval):
+            try:
+                caches[self.primary].get(PROBE_KEY)
+            except Exception:
+                continue
+            self.close()
+
+    def close(self):
+        with self.lock:
+            if not self.is_open:
+                return
+            self.is_open = False
+            self.failures = 0
+            self.stats["closed"] += 1
+            self.closing.set()
+        # Don't serve entries from this outage during the next one.
+        caches[self.fallback].clear()
+        log.warning("Cache %s recovered.", self.primary)
+
+
+def get_circuit(name, options) -> Circuit:
+    with _circuits_lock:
+        if name not in _circuits:
+            _circuits[name] = Circuit(name, options)
+        return _circuits[name]
+
+
+class CircuitBreakerCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._circuit = get_circuit(location or "default", params.get("OPTIONS", {}))
+
+    @property
+    def is_open(self) -> bool:
+        return self._circuit.is_open
+
+    @property
+    def stats(self) -> dict:
+        with self._circuit.lock:
+            return {**self._circuit.stats, "open": self._circuit.is_open}
+
+    def _call(self, method, *args, **kwargs):
+        circuit = self._circuit
+        if not circuit.is_open:
+            try:
+                result = getattr(caches[circuit.primary], method)(*args, **kwargs)
+            except ValueError:
+                # Raised by incr() and decr() for missing keys.
+                circuit.record_success()
+                raise
+            except Exception:
+                log.exception("Cache %s failed.", circuit.primary)
+                circuit.record_failure()
+            else:
+                circuit.record_success()
+                return result
+
+        with circuit.lock:
+            circuit.stats["fallbacks"] += 1
+        return getattr(caches[circuit.fallback], method)(*args, **kwargs)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("add", key, value, timeout, version)
+
+    def get(self, key, default=None, version=None):
+        return self._call("get", key, default, version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("set", key, value, timeout, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("touch", key, timeout, version)
+
+    def delete(self, key, version=None):
+        return self._call("delete", key, version)
+
+    def get_many(self, keys, version=None):
+        return self._call("get_many", keys, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("set_many", data, timeout, version)
+
+    def delete_many(self, keys, version=None):
+        return self._call("delete_many", keys, version)
+
+    def incr(self, key, delta=1, version=None):
+        return self._call("incr", key, delta, version)
+
+    def decr(self, key, delta=1, version=None):
+        return self._call("decr", key, delta, version)
+
+    def has_key(self, key, version=None):
+        return self._call("has_key", key, version)
+
+    def clear(self):
+        return self._call("clear")
+
+    def close(self, **kwargs):
+        caches[self._circuit.primary].close(**kwargs)
+        caches[self._circuit.fallback].close(**kwargs)
@@ -0,0 +1,71 @@
+"""
+Memcached backend for several nodes sharing one client per process.
+
+Django's PyMemcacheCache creates a client per thread and disconnects it at the
+end of every request. This backend keeps one client per process, which holds
+a pool of up to max_pool_size connections to each node that threads borrow
+from and return. Threads wait for a connection rather than going over.
+
+Keys are spread over the nodes with rendezvous hashing, so adding or removing
+a node only moves the keys of that node.
+
+Nodes that fail retry_attempts times in a row are left out for dead_timeout
+seconds, their keys going to the other nodes in the meantime.
+"""
+import functools
+import os
+import threading
+
+from django.core.cache.backends.memcached import PyMemcacheCache
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class BoundedClient:
+    """
+    Limit the number of threads using a client at once to the size of its
+    connection pools, which raise instead of waiting when they run out.
+    """
+
+    def __init__(self, client, size):
+        self.client = client
+        self.semaphore = threading.BoundedSemaphore(size)
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            with self.semaphore:
+                return attr(*args, **kwargs)
+
+        return call
+
+
+class PooledPyMemcacheCache(PyMemcacheCache):
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self._options = {"use_pooling": True, **self._options}
+
+    @property
+    def _cache(self):
+        key = (os.getpid(), tuple(self.client_servers))
+        client = _clients.get(key)
+        if client is None:
+            with _clients_lock:
+                client = _clients.get(key)
+                if client is None:
+                    client = self._class(self.client_servers, **self._options)
+                    max_pool_size = self._options.get("max_pool_size")
+                    if max_pool_size:
+                        client = BoundedClient(client, max_pool_size)
+                    _clients[key] = client
+        return client
+
+    def close(self, **kwargs):
+        # Connections are returned to the pool rather than closed after each
+        # request.
+        pass
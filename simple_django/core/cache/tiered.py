@@ -0,0 +1,452 @@
+"""
+Cache backend with an in-process LRU in front of another cache.
+
+Reads are served from a bounded, per-process store of recently used entries
+and only go to the remote cache, usually memcached, on a miss. Every write is
+made to the remote cache and the keys it changed are broadcast to the other
+processes with Postgres NOTIFY, which drop their local copies when they
+receive them. Local entries are also kept for at most L1_TIMEOUT seconds, so
+a lost notification can't keep a stale value around for long.
+
+While a process isn't listening for notifications, e.g. before the listener
+has connected or after the database went away, the local store is bypassed.
+
+Counters aren't kept locally: integer values are always read from the remote
+cache, so incr() and decr() don't need to be broadcast, and neither do add()s
+of integers. Keys starting with one of the BYPASS_PREFIXES, e.g. write mostly
+buffers, skip the local store and broadcasts altogether.
+
+    CACHES = {
+        "default": {
+            "BACKEND": "simple_django.core.cache.tiered.TieredCache",
+            "LOCATION": "default",
+            "OPTIONS": {
+                "REMOTE": "memcached",
+                "MAX_ENTRIES": 10000,
+                "BYPASS_PREFIXES": ["throttle_", "last_login_buffer_"],
+            },
+        },
+        "memcached": {...},
+    }
+"""
+import atexit
+import json
+import logging
+import os
+import pickle
+import queue
+import select
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.db import connections
+
+log = logging.getLogger("simple_django.core.cache.tiered")
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more.
+MAX_PAYLOAD_SIZE = 7900
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class LocalStore:
+    """
+    Entries and statistics shared by every thread of the process, along with
+    the thread listening for invalidations from other processes.
+    """
+
+    def __init__(self, name, options):
+        self.name = name
+        self.max_entries = options.get("MAX_ENTRIES", 10000)
+        self.max_age = options.get("L1_TIMEOUT", 60)
+        self.broadcast = options.get("BROADCAST", True)
+        self.channel = options.get("CHANNEL", f"cache_invalidation_{name}")
+        self.database = options.get("DATABASE", "default")
+
+        self.lock = threading.Lock()
+        self.data = OrderedDict()
+        self.stats = dict.fromkeys(
+            ["hits", "misses", "remote_hits", "remote_misses", "invalidations"], 0
+        )
+
+        # Bumped by every invalidation received, so that values read from
+        # the remote cache before one arrived aren't stored locally.
+        self.generation = 0
+
+        self.node_id = uuid.uuid4().hex
+        self.pid = None
+        self.listener = None
+        self.stopping = None
+        # Name of the database the listener is connected to.
+        self.dbname = None
+        self.listening = threading.Event()
+        self.outbox = queue.SimpleQueue()
+        self.wakeup_r = self.wakeup_w = None
+
+    @property
+    def enabled(self) -> bool:
+        if not self.broadcast:
+            return True
+        self.start_listener()
+        return self.listening.is_set()
+
+    def count(self, stat: str, n: int = 1):
+        with self.lock:
+            self.stats[stat] += n
+
+    def get(self, key):
+        with self.lock:
+            try:
+                value, expiry = self.data[key]
+            except KeyError:
+                self.stats["misses"] += 1
+                return None
+            if expiry <= time.monotonic():
+                del self.data[key]
+                self.stats["misses"] += 1
+                return None
+            self.data.move_to_end(key)
+            self.stats["hits"] += 1
+        return pickle.loads(value)
+
+    def set(self, key, value, timeout, generation=None):
+        if not is_local_value(value):
+            self.discard([key])
+            return
+        max_age = self.max_age if timeout is None else min(timeout, self.max_age)
+        if max_age <= 0:
+            self.discard([key])
+            return
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.data[key] = (value, time.monotonic() + max_age)
+            self.data.move_to_end(key)
+            while len(self.data) > self.max_entries:
+                self.data.popitem(last=False)
+
+    def discard(self, keys):
+        with self.lock:
+            for key in keys:
+                self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.generation += 1
+
+    def invalidate(self, keys=None):
+        """
+        Drop keys, or every entry if keys is None, here and, once the listener
+        gets to it, in every other process.
+        """
+        if keys is None:
+            self.clear()
+        else:
+            self.discard(keys)
+        if self.broadcast and keys != []:
+            self.outbox.put(keys)
+            if self.wakeup_w is not None:
+                os.write(self.wakeup_w, b"\0")
+
+    def start_listener(self):
+        if self.pid == os.getpid():
+            return
+        with _stores_lock:
+            if self.pid == os.getpid():
+                return
+            # Forked children get their own store and listener.
+            self.clear()
+            self.listening.clear()
+            self.outbox = queue.SimpleQueue()
+            self.wakeup_r, self.wakeup_w = os.pipe()
+            self.pid = os.getpid()
+            self.stopping = threading.Event()
+            self.listener = threading.Thread(
+                target=self.listen,
+                args=(self.stopping,),
+                name=f"cache-listener-{self.name}",
+                daemon=True,
+            )
+            self.listener.start()
+
+    def stop_listener(self):
+        """Stop listening and close the listener's connection."""
+        with _stores_lock:
+            if self.listener is None or self.pid != os.getpid():
+                return
+            listener, self.listener = self.listener, None
+            self.stopping.set()
+            os.write(self.wakeup_w, b"\0")
+        listener.join(5)
+        self.listening.clear()
+        self.clear()
+        with _stores_lock:
+            # Restarted on the next read or write.
+            self.pid = None
+            self.dbname = None
+
+    def listen(self, stopping):
+        import psycopg2
+
+        retry_delay = 1
+        while not stopping.is_set():
+            connection = None
+            try:
+                params = connections[self.database].get_connection_params()
+                self.dbname = params.get("dbname")
+                connection = psycopg2.connect(**params)
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                # Entries cached while nobody was listening may be stale.
+                self.clear()
+                self.listening.set()
+                retry_delay = 1
+                self.serve(connection, stopping)
+            except Exception:
+                log.exception("Cache invalidation listener failed.")
+                stopping.wait(retry_delay)
+                retry_delay = min(retry_delay * 2, 30)
+            finally:
+                self.listening.clear()
+                self.clear()
+                if connection is not None:
+                    connection.close()
+
+    def serve(self, connection, stopping):
+        while not stopping.is_set():
+            readable, _, _ = select.select([connection, self.wakeup_r], [], [], 30)
+            if self.wakeup_r in readable:
+                os.read(self.wakeup_r, 4096)
+            connection.poll()
+            while connection.notifies:
+                notify = connection.notifies.pop(0)
+                self.receive(notify.payload)
+            self.send(connection)
+
+    def receive(self, payload):
+        node_id, keys = json.loads(payload)
+        if node_id == self.node_id:
+            return
+        if keys is None:
+            self.clear()
+            self.count("invalidations")
+            return
+        with self.lock:
+            for key in keys:
+                self.data.pop(key, None)
+            self.generation += 1
+            self.stats["invalidations"] += len(keys)
+
+    def send(self, connection):
+        keys = []
+        clear = False
+        while True:
+            try:
+                batch = self.outbox.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                clear = True
+            else:
+                keys.extend(batch)
+
+        payloads = [json.dumps([self.node_id, None])] if clear else []
+        payloads.extend(self.get_payloads(keys))
+        with connection.cursor() as cursor:
+            for payload in payloads:
+                cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, payload])
+
+    def get_payloads(self, keys):
+        batch = []
+        size = 0
+        for key in dict.fromkeys(keys):
+            if batch and size + len(key) + 4 > MAX_PAYLOAD_SIZE - 40:
+                yield json.dumps([self.node_id, batch])
+                batch, size = [], 0
+            batch.append(key)
+            size += len(key) + 4
+        if batch:
+            yield json.dumps([self.node_id, batch])
+
+
+def is_local_value(value) -> bool:
+    """Whether value may be kept in the local store, counters aren't."""
+    return value is not None and type(value) is not int
+
+
+def stop_listeners(dbname=None):
+    """
+    Stop the listeners of every store, or those connected to database dbname,
+    e.g. before the test database is dropped.
+    """
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        if dbname is None or store.dbname == dbname:
+            store.stop_listener()
+
+
+atexit.register(stop_listeners)
+
+
+def get_store(name, options) -> LocalStore:
+    with _stores_lock:
+        if name not in _stores:
+            _stores[name] = LocalStore(name, options)
+        return _stores[name]
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._remote_alias = options["REMOTE"]
+        self._bypass_prefixes = tuple(options.get("BYPASS_PREFIXES", ()))
+        self._store = get_store(location or "default", options)
+
+    @property
+    def remote(self):
+        return caches[self._remote_alias]
+
+    @property
+    def stats(self) -> dict:
+        """Hit and miss counts of this process since it started."""
+        with self._store.lock:
+            return {**self._store.stats, "entries": len(self._store.data)}
+
+    def _is_local(self, key) -> bool:
+        return not key.startswith(self._bypass_prefixes)
+
+    def _invalidate(self, keys, version=None):
+        keys = [self.make_key(key, version) for key in keys if self._is_local(key)]
+        if keys:
+            self._store.invalidate(keys)
+
+    def _timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            return self.remote.default_timeout
+        return timeout
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.remote.add(key, value, timeout, version)
+        if added and is_local_value(value):
+            self._invalidate([key], version)
+        return added
+
+    def get(self, key, default=None, version=None):
+        if not self._is_local(key):
+            return self.remote.get(key, default, version)
+
+        local_key = self.make_key(key, version)
+        enabled = self._store.enabled
+        if enabled:
+            value = self._store.get(local_key)
+            if value is not None:
+                return value
+
+        generation = self._store.generation
+        sentinel = object()
+        value = self.remote.get(key, sentinel, version)
+        if value is sentinel:
+            self._store.count("remote_misses")
+            return default
+
+        self._store.count("remote_hits")
+        if enabled:
+            # Memcached doesn't say how long the entry has left.
+            self._store.set(local_key, value, None, generation)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.remote.set(key, value, timeout, version)
+        if not self._is_local(key):
+            return
+        local_key = self.make_key(key, version)
+        self._store.invalidate([local_key])
+        if self._store.enabled:
+            self._store.set(local_key, value, self._timeout(timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.remote.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        deleted = self.remote.delete(key, version)
+        self._invalidate([key], version)
+        return deleted
+
+    def get_many(self, keys, version=None):
+        results = {}
+        enabled = self._store.enabled
+        if enabled:
+            for key in keys:
+                if not self._is_local(key):
+                    continue
+                value = self._store.get(self.make_key(key, version))
+                if value is not None:
+                    results[key] = value
+
+        missing = [key for key in keys if key not in results]
+        generation = self._store.generation
+        if missing:
+            remote_results = self.remote.get_many(missing, version)
+            self._store.count("remote_hits", len(remote_results))
+            self._store.count("remote_misses", len(missing) - len(remote_results))
+            for key, value in remote_results.items():
+                if enabled and self._is_local(key):
+                    self._store.set(
+                        self.make_key(key, version), value, None, generation
+                    )
+            results.update(remote_results)
+        return results
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.remote.set_many(data, timeout, version)
+        self._invalidate(data, version)
+        if self._store.enabled:
+            for key, value in data.items():
+                if key not in failed and self._is_local(key):
+                    self._store.set(
+                        self.make_key(key, version), value, self._timeout(timeout)
+                    )
+        return failed
+
+    def delete_many(self, keys, version=None):
+        self.remote.delete_many(keys, version)
+        self._invalidate(keys, version)
+
+    # Counters are never stored locally, so there's nothing to invalidate.
+
+    def incr(self, key, delta=1, version=None):
+        return self.remote.incr(key, delta, version)
+
+    def decr(self, key, delta=1, version=None):
+        return self.remote.decr(key, delta, version)
+
+    def has_key(self, key, version=None):
+        local_key = self.make_key(key, version)
+        if (
+            self._is_local(key)
+            and self._store.enabled
+            and self._store.get(local_key) is not None
+        ):
+            return True
+        return self.remote.has_key(key, version)
+
+    def clear(self):
+        self.remote.clear()
+        self._store.invalidate()
+
+    def clear_local(self):
+        """Drop this process's local entries only."""
+        self._store.clear()
+
+    def close(self, **kwargs):
+        self.remote.close(**kwargs)
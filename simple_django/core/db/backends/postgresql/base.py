@@ -0,0 +1,65 @@
+"""
+PostgreSQL backend that borrows connections from a per-process pool, set up
+with the POOL key of the database settings, instead of opening one per thread.
+"""
+import os
+
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.creation import (
+    DatabaseCreation as BaseDatabaseCreation,
+)
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from simple_django.core.db import pool as connection_pool
+
+
+class DatabaseCreation(BaseDatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Postgres refuses to drop a database with open connections.
+        connection_pool.close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    pool = None
+
+    def get_pool(self, conn_params):
+        options = self.settings_dict.get("POOL")
+        if not options:
+            return None
+
+        key = (os.getpid(), self.alias, repr(sorted(conn_params.items())))
+        return connection_pool.get_pool(
+            key,
+            conn_params["dbname"],
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+            min_size=options.get("MIN_SIZE", 0),
+            max_size=options.get("MAX_SIZE", 10),
+            timeout=options.get("TIMEOUT", 5),
+            max_idle=options.get("MAX_IDLE", 300),
+            check_after=options.get("CHECK_AFTER", 30),
+        )
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        if self.pool is None:
+            return super().get_new_connection(conn_params)
+
+        connection = self.pool.getconn()
+        # Normally set by get_new_connection() when the connection is opened.
+        self.isolation_level = IsolationLevel(
+            self.settings_dict["OPTIONS"].get(
+                "isolation_level", IsolationLevel.READ_COMMITTED
+            )
+        )
+        return connection
+
+    def _close(self):
+        if self.pool is None:
+            return super()._close()
+
+        pool, self.pool = self.pool, None
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
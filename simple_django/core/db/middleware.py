@@ -0,0 +1,37 @@
+from django.conf import settings
+
+from simple_django.core.db.routers import replica_reads
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Read from replicas for requests with safe methods.
+
+    Responses to requests that wrote to the primary set a cookie that keeps
+    the client's reads on the primary for REPLICA_PIN_TIMEOUT seconds, so
+    that users see their own changes despite replication lag.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        use_replica = (
+            request.method in SAFE_METHODS
+            and settings.REPLICA_PIN_COOKIE_NAME not in request.COOKIES
+        )
+        with replica_reads(use_replica) as state:
+            response = self.get_response(request)
+
+        if state.wrote:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE_NAME,
+                "1",
+                max_age=settings.REPLICA_PIN_TIMEOUT,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
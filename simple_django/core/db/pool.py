@@ -0,0 +1,216 @@
+"""
+Pool of psycopg2 connections shared by the threads of a process.
+
+Connections are checked out when Django connects and returned when it closes
+the connection, at the end of each request with CONN_MAX_AGE = 0. Threads
+wait up to TIMEOUT seconds for a connection once MAX_SIZE are in use.
+
+Returned connections are rolled back and reset with DISCARD ALL, so session
+state such as SET commands, prepared statements, temporary tables or advisory
+locks doesn't outlive the request that created it. Django sets up the session,
+e.g. its time zone, again when it takes the connection from the pool.
+"""
+import collections
+import threading
+import time
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    pass
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        connect,
+        name: str = "",
+        min_size: int = 0,
+        max_size: int = 10,
+        timeout: float = 5,
+        max_idle: float = 300,
+        check_after: float = 30,
+    ):
+        """
+        connect is called without arguments to open connections. Connections
+        idle for more than max_idle seconds are closed, leaving at least
+        min_size open, and ones idle for more than check_after seconds are
+        checked with a query before being handed out.
+        """
+        self.connect = connect
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.check_after = check_after
+
+        self.condition = threading.Condition()
+        self.idle = collections.deque()
+        self.size = 0
+        self.closed = False
+        self.stats = dict.fromkeys(
+            [
+                "checkouts",
+                "connections_opened",
+                "connections_closed",
+                "waits",
+                "timeouts",
+                "failed_checks",
+            ],
+            0,
+        )
+        self.stats["wait_time"] = 0.0
+        self.stats["max_wait_time"] = 0.0
+
+    def get_stats(self) -> dict:
+        with self.condition:
+            return {
+                **self.stats,
+                "size": self.size,
+                "idle": len(self.idle),
+                "in_use": self.size - len(self.idle),
+            }
+
+    def getconn(self):
+        start = time.monotonic()
+        waited = False
+        while True:
+            connection, returned_at = self._checkout(start)
+            if connection is None:
+                waited = True
+                continue
+            if returned_at is None or self._check(connection, returned_at):
+                break
+            waited = True
+
+        wait_time = time.monotonic() - start
+        with self.condition:
+            self.stats["checkouts"] += 1
+            if waited:
+                self.stats["waits"] += 1
+            self.stats["wait_time"] += wait_time
+            self.stats["max_wait_time"] = max(self.stats["max_wait_time"], wait_time)
+        return connection
+
+    def _checkout(self, start):
+        """
+        Return an idle connection and when it was returned, a new connection
+        and None, or (None, None) after waiting for a connection to be
+        returned.
+        """
+        with self.condition:
+            while self.idle:
+                connection, returned_at = self.idle.pop()
+                if (
+                    time.monotonic() - returned_at > self.max_idle
+                    and self.size > self.min_size
+                ):
+                    self._discard(connection)
+                    continue
+                return connection, returned_at
+
+            if self.size < self.max_size:
+                self.size += 1
+            else:
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0 or not self.condition.wait(remaining):
+                    self.stats["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"No connection available in pool {self.name} after "
+                        f"{self.timeout} seconds."
+                    )
+                return None, None
+
+        try:
+            connection = self.connect()
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self.stats["connections_opened"] += 1
+        return connection, None
+
+    def _check(self, connection, returned_at) -> bool:
+        if not connection.closed:
+            if time.monotonic() - returned_at <= self.check_after:
+                return True
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                return True
+            except psycopg2.Error:
+                pass
+
+        with self.condition:
+            self.stats["failed_checks"] += 1
+            self._discard(connection)
+        return False
+
+    def _reset(self, connection) -> bool:
+        """Reset the session of a returned connection, return whether it worked."""
+        if connection.closed:
+            return False
+        try:
+            if connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            # DISCARD ALL can't run in a transaction. Django sets autocommit
+            # again when it takes the connection.
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute("DISCARD ALL")
+        except psycopg2.Error:
+            return False
+        return True
+
+    def putconn(self, connection):
+        reset = self._reset(connection)
+        with self.condition:
+            if self.closed or not reset:
+                self._discard(connection)
+            else:
+                self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+
+    def _discard(self, connection):
+        # Called with the condition held.
+        self.size -= 1
+        self.stats["connections_closed"] += 1
+        self.condition.notify()
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            while self.idle:
+                connection, _ = self.idle.pop()
+                self._discard(connection)
+
+
+def get_pool(key, name, connect, **options) -> ConnectionPool:
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(connect, name, **options)
+    return pool
+
+
+def close_pools(name=None):
+    """Close the idle connections of every pool, or those of database name."""
+    with _pools_lock:
+        for key, pool in list(_pools.items()):
+            if name is None or pool.name == name:
+                pool.close()
+                del _pools[key]
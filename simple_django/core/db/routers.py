@@ -0,0 +1,125 @@
+"""
+Route reads to the read replicas in DATABASE_REPLICAS.
+
+Reads only go to a replica inside replica_reads(), entered for requests with
+safe methods by ReplicaRoutingMiddleware, or around read-only Celery tasks.
+Everything else, and every read after a write in the same block, goes to the
+primary. Replicas lagging more than REPLICA_MAX_LAG seconds behind the
+primary, or failing the lag check, are left out until the next check.
+"""
+import contextlib
+import contextvars
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+log = logging.getLogger("simple_django.core.db.routers")
+
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery()
+        OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(
+        EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+    )
+END
+"""
+
+_routing = contextvars.ContextVar("replica_routing", default=None)
+
+# Replica alias: (time of the check, whether it is usable).
+_lag_checks = {}
+
+
+class RoutingState:
+    def __init__(self, use_replica: bool):
+        self.use_replica = use_replica
+        self.replica = None
+        self.wrote = False
+
+
+@contextlib.contextmanager
+def replica_reads(use_replica: bool = True):
+    """
+    Send reads to a replica within the block, or to the primary if
+    use_replica is false. Also usable as a decorator, e.g. on Celery tasks
+    that don't write and can live with a few seconds of lag.
+    """
+    state = RoutingState(use_replica)
+    token = _routing.set(state)
+    try:
+        yield state
+    finally:
+        _routing.reset(token)
+
+
+def get_replica_lag(alias: str) -> float:
+    """Return how many seconds the database is behind its primary."""
+    with connections[alias].cursor() as cursor:
+        cursor.execute(LAG_SQL)
+        return float(cursor.fetchone()[0])
+
+
+def is_replica_usable(alias: str) -> bool:
+    checked_at, usable = _lag_checks.get(alias, (None, False))
+    if checked_at is not None and (
+        time.monotonic() - checked_at < settings.REPLICA_LAG_CHECK_INTERVAL
+    ):
+        return usable
+
+    try:
+        lag = get_replica_lag(alias)
+    except DatabaseError:
+        log.warning("Lag check of replica %s failed.", alias, exc_info=True)
+        connections[alias].close()
+        usable = False
+    else:
+        usable = lag <= settings.REPLICA_MAX_LAG
+        if not usable:
+            log.warning("Replica %s is %.1f seconds behind.", alias, lag)
+
+    _lag_checks[alias] = (time.monotonic(), usable)
+    return usable
+
+
+def clear_lag_checks():
+    _lag_checks.clear()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None:
+            return None
+        if not state.use_replica or state.wrote:
+            return DEFAULT_DB_ALIAS
+
+        if state.replica is None:
+            replicas = [
+                alias
+                for alias in settings.DATABASE_REPLICAS
+                if is_replica_usable(alias)
+            ]
+            # Stick to one replica so that reads are consistent with each other.
+            state.replica = random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
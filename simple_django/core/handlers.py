@@ -0,0 +1,140 @@
+"""
+WSGI and ASGI handlers that run a shorter middleware stack for the API.
+
+Requests under API_PATH_PREFIX go through API_MIDDLEWARE instead of
+MIDDLEWARE. The API authenticates with JWTs, so sessions, CSRF protection,
+messages and the rest of the middleware needed by the site are skipped.
+"""
+import logging
+
+import django
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.exception import convert_exception_to_response
+from django.core.handlers.wsgi import WSGIHandler
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger("django.request")
+
+
+class APIHandler(BaseHandler):
+    def get_middleware(self) -> list:
+        return settings.API_MIDDLEWARE
+
+    def load_middleware(self, is_async=False):
+        """
+        BaseHandler.load_middleware() from Django 4.2, building the chain from
+        get_middleware() rather than settings.MIDDLEWARE. Keep in step with
+        Django, test_load_middleware_matches_django fails when they differ.
+        """
+        self._view_middleware = []
+        self._template_response_middleware = []
+        self._exception_middleware = []
+
+        get_response = self._get_response_async if is_async else self._get_response
+        handler = convert_exception_to_response(get_response)
+        handler_is_async = is_async
+        for middleware_path in reversed(self.get_middleware()):
+            middleware = import_string(middleware_path)
+            middleware_can_sync = getattr(middleware, "sync_capable", True)
+            middleware_can_async = getattr(middleware, "async_capable", False)
+            if not middleware_can_sync and not middleware_can_async:
+                raise RuntimeError(
+                    "Middleware %s must have at least one of "
+                    "sync_capable/async_capable set to True." % middleware_path
+                )
+            elif not handler_is_async and middleware_can_sync:
+                middleware_is_async = False
+            else:
+                middleware_is_async = middleware_can_async
+            try:
+                # Adapt handler, if needed.
+                adapted_handler = self.adapt_method_mode(
+                    middleware_is_async,
+                    handler,
+                    handler_is_async,
+                    debug=settings.DEBUG,
+                    name="middleware %s" % middleware_path,
+                )
+                mw_instance = middleware(adapted_handler)
+            except MiddlewareNotUsed as exc:
+                if settings.DEBUG:
+                    if str(exc):
+                        logger.debug("MiddlewareNotUsed(%r): %s", middleware_path, exc)
+                    else:
+                        logger.debug("MiddlewareNotUsed: %r", middleware_path)
+                continue
+            else:
+                handler = adapted_handler
+
+            if mw_instance is None:
+                raise ImproperlyConfigured(
+                    "Middleware factory %s returned None." % middleware_path
+                )
+
+            if hasattr(mw_instance, "process_view"):
+                self._view_middleware.insert(
+                    0,
+                    self.adapt_method_mode(is_async, mw_instance.process_view),
+                )
+            if hasattr(mw_instance, "process_template_response"):
+                self._template_response_middleware.append(
+                    self.adapt_method_mode(
+                        is_async, mw_instance.process_template_response
+                    ),
+                )
+            if hasattr(mw_instance, "process_exception"):
+                # The exception-handling stack is still always synchronous for
+                # now, so adapt that way.
+                self._exception_middleware.append(
+                    self.adapt_method_mode(False, mw_instance.process_exception),
+                )
+
+            handler = convert_exception_to_response(mw_instance)
+            handler_is_async = middleware_is_async
+
+        # Adapt the top of the stack, if needed.
+        handler = self.adapt_method_mode(is_async, handler, handler_is_async)
+        # We only assign to this when initialization is complete as it is used
+        # as a flag for initialization being complete.
+        self._middleware_chain = handler
+
+
+class APIMiddlewareMixin:
+    def load_middleware(self, is_async=False):
+        super().load_middleware(is_async)
+        self.api_handler = APIHandler()
+        self.api_handler.load_middleware(is_async)
+
+    def is_api_request(self, request) -> bool:
+        return request.path_info.startswith(settings.API_PATH_PREFIX)
+
+    def get_response(self, request):
+        if self.is_api_request(request):
+            return self.api_handler.get_response(request)
+        return super().get_response(request)
+
+    async def get_response_async(self, request):
+        if self.is_api_request(request):
+            return await self.api_handler.get_response_async(request)
+        return await super().get_response_async(request)
+
+
+class APIWSGIHandler(APIMiddlewareMixin, WSGIHandler):
+    pass
+
+
+class APIASGIHandler(APIMiddlewareMixin, ASGIHandler):
+    pass
+
+
+def get_wsgi_application():
+    django.setup(set_prefix=False)
+    return APIWSGIHandler()
+
+
+def get_asgi_application():
+    django.setup(set_prefix=False)
+    return APIASGIHandler()
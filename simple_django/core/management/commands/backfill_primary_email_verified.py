@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, models
+
+from simple_django.accounts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Populate users.primary_email_verified for existing rows, one chunk of "
+        "ids per transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10_000,
+            help="Number of user ids updated per transaction.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0,
+            help="Seconds to wait between chunks to go easy on the database.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        bounds = User.objects.aggregate(
+            min_id=models.Min("id"), max_id=models.Max("id")
+        )
+        if bounds["min_id"] is None:
+            self.stdout.write("No users to update.")
+            return
+
+        updated = 0
+        for start in range(bounds["min_id"], bounds["max_id"] + 1, chunk_size):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    UPDATE users
+                    SET primary_email_verified = primary_email_verified(id)
+                    WHERE id >= %s AND id < %s
+                    AND primary_email_verified IS DISTINCT FROM
+                        primary_email_verified(id)
+                    """,
+                    [start, start + chunk_size],
+                )
+                updated += cursor.rowcount
+            self.stdout.write(f"Updated users up to id {start + chunk_size - 1}.")
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Success. {updated} users updated."))
@@ -0,0 +1,138 @@
+import json
+import math
+import os
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    BCryptSHA256PasswordHasher,
+    PBKDF2PasswordHasher,
+)
+from django.core.management.base import BaseCommand
+
+from simple_django.accounts import hashers
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the password hashers on this host and write the parameters "
+        "that hit the target time per hash."
+    )
+
+    password = "calibrate-password-hashers"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target-ms",
+            type=float,
+            default=250,
+            help="Target time to hash one password, in milliseconds.",
+        )
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=5,
+            help="Number of hashes to time for each candidate.",
+        )
+        parser.add_argument(
+            "--output",
+            default=str(settings.PASSWORD_HASHERS_PARAMETERS_FILE),
+            help="Where to write the parameters.",
+        )
+
+    def time_hash(self, hasher) -> float:
+        salt = hasher.salt()
+        timings = []
+        for _ in range(self.samples):
+            start = time.perf_counter()
+            hasher.encode(self.password, salt)
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings)
+
+    def calibrate_argon2(self) -> dict:
+        hasher = Argon2PasswordHasher()
+        hasher.parallelism = min(os.cpu_count() or 1, hasher.parallelism)
+        hasher.memory_cost = Argon2PasswordHasher.memory_cost
+        hasher.time_cost = hashers.ARGON2_MIN_TIME_COST
+
+        # Trade memory for speed first, then add passes until the target is met.
+        elapsed = self.time_hash(hasher)
+        while elapsed > self.target and hasher.memory_cost > (
+            hashers.ARGON2_MIN_MEMORY_COST
+        ):
+            hasher.memory_cost = max(
+                hasher.memory_cost // 2, hashers.ARGON2_MIN_MEMORY_COST
+            )
+            elapsed = self.time_hash(hasher)
+
+        while elapsed < self.target:
+            hasher.time_cost += 1
+            candidate = self.time_hash(hasher)
+            if candidate > self.target:
+                hasher.time_cost -= 1
+                break
+            elapsed = candidate
+
+        self.report(hasher, elapsed)
+        return {
+            "time_cost": hasher.time_cost,
+            "memory_cost": hasher.memory_cost,
+            "parallelism": hasher.parallelism,
+        }
+
+    def calibrate_bcrypt(self) -> dict:
+        hasher = BCryptSHA256PasswordHasher()
+        hasher.rounds = hashers.BCRYPT_MIN_ROUNDS
+        elapsed = self.time_hash(hasher)
+
+        # Every extra round doubles the work.
+        if elapsed < self.target:
+            hasher.rounds += int(math.log2(self.target / elapsed))
+            elapsed = self.time_hash(hasher)
+
+        self.report(hasher, elapsed)
+        return {"rounds": hasher.rounds}
+
+    def calibrate_pbkdf2(self) -> dict:
+        hasher = PBKDF2PasswordHasher()
+        hasher.iterations = hashers.PBKDF2_MIN_ITERATIONS
+        elapsed = self.time_hash(hasher)
+
+        # Work grows linearly with the iteration count.
+        if elapsed < self.target:
+            iterations = int(hasher.iterations * self.target / elapsed)
+            hasher.iterations = iterations - iterations % 1000
+            elapsed = self.time_hash(hasher)
+
+        self.report(hasher, elapsed)
+        return {"iterations": hasher.iterations}
+
+    def report(self, hasher, elapsed: float):
+        self.stdout.write(f"{hasher.algorithm}: {elapsed * 1000:.1f}ms per hash.")
+
+    def handle(self, *args, **options):
+        self.target = options["target_ms"] / 1000
+        self.samples = options["samples"]
+        output = Path(options["output"])
+
+        self.stdout.write(
+            f"Calibrating password hashers for {options['target_ms']:g}ms per hash."
+        )
+        parameters = {}
+        for algorithm, calibrate in (
+            (Argon2PasswordHasher.algorithm, self.calibrate_argon2),
+            (BCryptSHA256PasswordHasher.algorithm, self.calibrate_bcrypt),
+            (PBKDF2PasswordHasher.algorithm, self.calibrate_pbkdf2),
+        ):
+            try:
+                parameters[algorithm] = calibrate()
+            except ValueError as e:
+                # Raised by hashers whose library isn't installed.
+                self.stderr.write(self.style.WARNING(f"Skipping {algorithm}: {e}"))
+
+        output.write_text(json.dumps(parameters, indent=2) + "\n")
+        hashers.load_parameters.cache_clear()
+        self.stdout.write(self.style.SUCCESS(f"Parameters written to {output}."))
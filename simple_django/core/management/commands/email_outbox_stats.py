@@ -0,0 +1,15 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from simple_django.accounts import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Print the verification email outbox backlog and the results of the "
+        "last dispatch as JSON, e.g. for monitoring."
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(json.dumps(outbox.get_stats(), default=str))
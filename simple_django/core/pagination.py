@@ -0,0 +1,253 @@
+"""
+Pagination that stays fast on large tables: keyset pagination for DRF list
+views and a Django paginator with estimated counts for the admin and
+templates.
+"""
+import base64
+import binascii
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pages are fetched with a WHERE clause on the ordering columns of the last
+    row seen rather than an OFFSET, so with an index on those columns every
+    page costs the same however deep it is. The ordering is the view's
+    ordering attribute, the queryset's or the model's, with the primary key
+    appended as a tie-breaker. All columns must be sorted in the same
+    direction and be non null.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    invalid_cursor_message = "Invalid cursor."
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_ordering(self, queryset, view) -> list[str]:
+        ordering = list(
+            getattr(view, "ordering", None)
+            or queryset.query.order_by
+            or queryset.model._meta.ordering
+        )
+        descending = ordering[0].startswith("-")
+        if any(name.startswith("-") != descending for name in ordering):
+            raise ValueError(f"Can't paginate {ordering} with mixed directions.")
+
+        pk_name = queryset.model._meta.pk.name
+        if ordering[-1].lstrip("-") not in (pk_name, "pk"):
+            ordering.append(f"-{pk_name}" if descending else pk_name)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        ordering = self.get_ordering(queryset, view)
+        self.names = [name.lstrip("-") for name in ordering]
+        self.fields = [queryset.model._meta.get_field(name) for name in self.names]
+        if self.names[-1] == "pk":
+            self.fields[-1] = queryset.model._meta.pk
+        descending = ordering[0].startswith("-")
+
+        position, reverse = self.decode_cursor(request)
+        if reverse:
+            # Walk backwards from the first row of the next page.
+            ordering = [
+                name[1:] if name.startswith("-") else f"-{name}" for name in ordering
+            ]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(
+                    position, "lt" if descending != reverse else "gt"
+                )
+            )
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.page = results
+        return results
+
+    def get_keyset_filter(self, position: list, lookup: str) -> Q:
+        """
+        Select the rows after position, e.g. for (a, b) < (x, y):
+        a <= x AND (a < x OR (a = x AND b < y)).
+        """
+        after = Q()
+        for i, name in enumerate(self.names):
+            after |= Q(
+                **dict(zip(self.names[:i], position[:i])),
+                **{f"{name}__{lookup}": position[i]},
+            )
+        # Lets the database bound the index scan by the first column.
+        return Q(**{f"{self.names[0]}__{lookup}e": position[0]}) & after
+
+    def decode_cursor(self, request) -> tuple[list | None, bool]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            values = cursor["p"]
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [
+                field.to_python(value) for field, value in zip(self.fields, values)
+            ]
+            return position, bool(cursor.get("r"))
+        except (
+            binascii.Error,
+            KeyError,
+            TypeError,
+            UnicodeError,
+            ValueError,
+            ValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse: bool) -> str:
+        cursor = {"p": [field.value_to_string(obj) for field in self.fields]}
+        if reverse:
+            cursor["r"] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self) -> str | None:
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that estimates the number of rows of large querysets from the
+    planner's statistics instead of counting them.
+
+    Querysets estimated to have at least PAGINATOR_ESTIMATE_THRESHOLD rows
+    keep the estimate. Smaller ones are counted and the count is cached for
+    PAGINATOR_COUNT_CACHE_TIMEOUT seconds. As an estimate can be short of the
+    real count, page numbers past the last page are let through and give
+    empty pages rather than errors.
+    """
+
+    # Whether count is an estimate, set when count is first read.
+    estimated = False
+
+    @cached_property
+    def count(self) -> int:
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+
+        key = self.get_count_cache_key()
+        count = cache.get(key)
+        if count is not None:
+            return count
+
+        estimate = self.get_estimated_count()
+        if estimate >= settings.PAGINATOR_ESTIMATE_THRESHOLD:
+            self.estimated = True
+            return estimate
+
+        count = super().count
+        cache.set(key, count, settings.PAGINATOR_COUNT_CACHE_TIMEOUT)
+        return count
+
+    def get_count_cache_key(self) -> str:
+        sql = repr(self.object_list.query.sql_with_params())
+        return f"paginator_count_{hashlib.sha256(sql.encode()).hexdigest()}"
+
+    def get_estimated_count(self) -> int:
+        queryset = self.object_list
+        query = queryset.query
+        if (
+            not query.where
+            and not query.distinct
+            and not query.is_sliced
+            and len(query.alias_map) <= 1
+        ):
+            # Rows of the whole table, as of its last VACUUM or ANALYZE.
+            with connections[queryset.db].cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            # -1 for tables that were never analyzed.
+            if row and row[0] >= 0:
+                return int(row[0])
+
+        plan = json.loads(queryset.explain(format="json"))
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if not self.estimated or int(number) < 1:
+                raise
+            return int(number)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.estimated:
+            return super().page(number)
+        # Don't cut the page short at the estimated count.
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom : bottom + self.per_page], number, self
+        )
@@ -0,0 +1,22 @@
+from django.test import runner
+
+from simple_django.core.cache import tiered
+
+
+class DiscoverRunner(runner.DiscoverRunner):
+    """
+    Test runner skipping the tests tagged slow unless they're asked for with
+    --tag slow, and stopping the cache listeners before the test databases are
+    dropped.
+    """
+
+    def __init__(self, *args, tags=None, exclude_tags=None, **kwargs):
+        exclude_tags = set(exclude_tags or [])
+        if "slow" not in (tags or []):
+            exclude_tags.add("slow")
+        super().__init__(*args, tags=tags, exclude_tags=exclude_tags, **kwargs)
+
+    def teardown_databases(self, old_config, **kwargs):
+        # Postgres refuses to drop a database with open connections.
+        tiered.stop_listeners()
+        super().teardown_databases(old_config, **kwargs)
@@ -0,0 +1,141 @@
+"""
+In-process stand-in for memcached speaking the subset of the text protocol
+used by pymemcache, so that multi-node cache configurations can be tested
+without running memcached.
+"""
+import socket
+import socketserver
+import threading
+import time
+
+
+class FakeMemcachedHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.connections += 1
+        self.server.sockets.append(self.connection)
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, *args = line.split()
+            handler = getattr(self, f"do_{command.decode()}", None)
+            if handler is None:
+                self.wfile.write(b"ERROR\r\n")
+                continue
+            noreply = args and args[-1] == b"noreply"
+            if noreply:
+                args = args[:-1]
+            with self.server.lock:
+                response = handler(*args)
+            if response is None:
+                return
+            if not noreply:
+                self.wfile.write(response)
+
+    def get_expiry(self, exptime):
+        exptime = int(exptime)
+        if exptime == 0:
+            return None
+        if exptime < 0:
+            return 0
+        if exptime > 60 * 60 * 24 * 30:
+            return exptime
+        return time.time() + exptime
+
+    def lookup(self, key):
+        item = self.server.data.get(key)
+        if item is None:
+            return None
+        if item[2] is not None and item[2] <= time.time():
+            del self.server.data[key]
+            return None
+        return item
+
+    def store(self, key, flags, exptime, size):
+        value = self.rfile.read(int(size) + 2)[:-2]
+        self.server.data[key] = (flags, value, self.get_expiry(exptime))
+        return b"STORED\r\n"
+
+    def do_set(self, key, flags, exptime, size):
+        return self.store(key, flags, exptime, size)
+
+    def do_add(self, key, flags, exptime, size):
+        if self.lookup(key) is not None:
+            self.rfile.read(int(size) + 2)
+            return b"NOT_STORED\r\n"
+        return self.store(key, flags, exptime, size)
+
+    def do_get(self, *keys):
+        response = b""
+        for key in keys:
+            item = self.lookup(key)
+            if item is not None:
+                flags, value, _ = item
+                response += b"VALUE %s %s %d\r\n%s\r\n" % (
+                    key,
+                    flags,
+                    len(value),
+                    value,
+                )
+        return response + b"END\r\n"
+
+    def do_delete(self, key):
+        if self.lookup(key) is None:
+            return b"NOT_FOUND\r\n"
+        del self.server.data[key]
+        return b"DELETED\r\n"
+
+    def do_incr(self, key, delta, sign=1):
+        item = self.lookup(key)
+        if item is None:
+            return b"NOT_FOUND\r\n"
+        flags, value, expiry = item
+        value = b"%d" % max(int(value) + sign * int(delta), 0)
+        self.server.data[key] = (flags, value, expiry)
+        return value + b"\r\n"
+
+    def do_decr(self, key, delta):
+        return self.do_incr(key, delta, sign=-1)
+
+    def do_touch(self, key, exptime):
+        item = self.lookup(key)
+        if item is None:
+            return b"NOT_FOUND\r\n"
+        self.server.data[key] = (*item[:2], self.get_expiry(exptime))
+        return b"TOUCHED\r\n"
+
+    def do_flush_all(self, *args):
+        self.server.data.clear()
+        return b"OK\r\n"
+
+    def do_quit(self):
+        return None
+
+
+class FakeMemcached(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeMemcachedHandler)
+        self.data = {}
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.sockets = []
+
+    @property
+    def location(self) -> str:
+        return "%s:%d" % self.server_address
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        for sock in self.sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
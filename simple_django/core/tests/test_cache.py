@@ -0,0 +1,310 @@
+import threading
+import time
+import uuid
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from simple_django.core.cache.breaker import CircuitBreakerCache
+from simple_django.core.cache.memcached import PooledPyMemcacheCache
+from simple_django.core.cache.tiered import TieredCache, stop_listeners
+from simple_django.core.tests.fake_memcached import FakeMemcached
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "remote": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "remote",
+    },
+}
+
+
+def make_cache(**options):
+    options = {"REMOTE": "remote", "BROADCAST": False, **options}
+    return TieredCache(uuid.uuid4().hex, {"OPTIONS": options})
+
+
+@override_settings(CACHES=CACHES)
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = make_cache(MAX_ENTRIES=2)
+        self.cache.remote.clear()
+
+    def test_reads_served_locally(self):
+        self.cache.set("a", {"value": 1})
+        self.assertEqual(self.cache.get("a"), {"value": 1})
+        self.assertEqual(self.cache.stats["hits"], 1)
+
+        # Local copies can't be changed by mutating the returned value.
+        self.cache.get("a")["value"] = 2
+        self.assertEqual(self.cache.get("a"), {"value": 1})
+
+        # Written behind the local store's back.
+        self.cache.remote.set("a", {"value": 3})
+        self.assertEqual(self.cache.get("a"), {"value": 1})
+
+        self.cache.clear_local()
+        self.assertEqual(self.cache.get("a"), {"value": 3})
+        self.assertEqual(self.cache.stats["remote_hits"], 1)
+
+    def test_least_recently_used_evicted(self):
+        self.cache.set_many({"a": "1", "b": "2"})
+        self.cache.get("a")
+        self.cache.set("c", "3")
+        self.assertEqual(self.cache.stats["entries"], 2)
+
+        self.cache.get_many(["a", "b", "c"])
+        stats = self.cache.stats
+        self.assertEqual(stats["remote_hits"], 1)
+        self.assertEqual(stats["remote_misses"], 0)
+
+    def test_local_entries_expire(self):
+        cache = make_cache(L1_TIMEOUT=0.05)
+        cache.set("a", "1", timeout=60)
+        cache.remote.set("a", "2")
+        self.assertEqual(cache.get("a"), "1")
+        time.sleep(0.1)
+        self.assertEqual(cache.get("a"), "2")
+
+    def test_writes_invalidate(self):
+        self.cache.set("counter", 1)
+        self.assertEqual(self.cache.incr("counter"), 2)
+        self.assertEqual(self.cache.get("counter"), 2)
+
+        self.assertFalse(self.cache.add("counter", 5))
+        self.cache.delete("counter")
+        self.assertIsNone(self.cache.get("counter"))
+        self.assertEqual(self.cache.get("counter", "default"), "default")
+        self.assertTrue(self.cache.add("counter", 5))
+        self.assertEqual(self.cache.get("counter"), 5)
+
+    def test_counters_not_stored_locally(self):
+        self.cache.set("counter", 1)
+        self.cache.remote.incr("counter")
+        self.assertEqual(self.cache.get("counter"), 2)
+        self.assertEqual(self.cache.stats["entries"], 0)
+
+    def test_bypass_prefixes(self):
+        cache = make_cache(BYPASS_PREFIXES=["buffer_"])
+        cache.set_many({"buffer_1": "a", "other": "b"})
+        cache.set("buffer_2", "c")
+        self.assertEqual(
+            cache.get_many(["buffer_1", "buffer_2"]),
+            {
+                "buffer_1": "a",
+                "buffer_2": "c",
+            },
+        )
+        self.assertEqual(cache.stats["entries"], 1)
+        self.assertEqual(cache.stats["hits"], 0)
+
+
+@override_settings(CACHES=CACHES)
+class TieredCacheBroadcastTests(TransactionTestCase):
+    def wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("Timed out.")
+            time.sleep(0.01)
+
+    def test_invalidations_broadcast(self):
+        channel = f"test_cache_{uuid.uuid4().hex}"
+        nodes = [
+            make_cache(BROADCAST=True, CHANNEL=channel, DATABASE=connection.alias)
+            for _ in range(2)
+        ]
+        for node in nodes:
+            self.addCleanup(node._store.stop_listener)
+            self.wait_for(lambda: node._store.enabled)
+        first, second = nodes
+
+        first.set("a", "1")
+        self.assertEqual(second.get("a"), "1")
+        self.assertEqual(second.get("a"), "1")
+        self.assertEqual(second.stats["hits"], 1)
+
+        first.set("a", "2")
+        self.wait_for(lambda: second.stats["invalidations"])
+        self.assertEqual(second.get("a"), "2")
+        # Nodes ignore their own notifications.
+        self.assertEqual(first.stats["invalidations"], 0)
+
+        # Counters aren't stored locally, so changes aren't broadcast.
+        self.assertTrue(first.add("counter", 1))
+        first.incr("counter")
+        self.assertTrue(first._store.outbox.empty())
+
+        first.clear()
+        self.wait_for(lambda: second.stats["invalidations"] == 2)
+        self.assertEqual(second.stats["entries"], 0)
+
+    def test_listeners_stopped(self):
+        node = make_cache(
+            BROADCAST=True,
+            CHANNEL=f"test_cache_{uuid.uuid4().hex}",
+            DATABASE=connection.alias,
+        )
+        self.addCleanup(node._store.stop_listener)
+        self.wait_for(lambda: node._store.enabled)
+        listener = node._store.listener
+
+        stop_listeners("another_database")
+        self.assertTrue(listener.is_alive())
+
+        stop_listeners(connection.settings_dict["NAME"])
+        self.assertFalse(listener.is_alive())
+        self.assertIsNone(node._store.listener)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_stat_activity WHERE query LIKE %s",
+                [f'LISTEN "{node._store.channel}"'],
+            )
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+
+class PooledMemcachedTests(SimpleTestCase):
+    def start_node(self):
+        node = FakeMemcached().start()
+        self.addCleanup(node.stop)
+        return node
+
+    def make_cache(self, nodes, **options):
+        options = {"max_pool_size": 4, "retry_attempts": 1, **options}
+        return PooledPyMemcacheCache(
+            [node.location for node in nodes], {"OPTIONS": options}
+        )
+
+    def setUp(self):
+        self.nodes = [self.start_node() for _ in range(3)]
+        self.cache = self.make_cache(self.nodes)
+        self.data = {f"key{i}": i for i in range(300)}
+
+    def test_keys_spread_over_nodes(self):
+        self.cache.set_many(self.data)
+        for node in self.nodes:
+            self.assertGreater(len(node.data), 50)
+        self.assertEqual(self.cache.get_many(self.data), self.data)
+
+        self.assertTrue(self.cache.add("counter", 1))
+        self.assertEqual(self.cache.incr("counter", 2), 3)
+        self.assertTrue(self.cache.delete("counter"))
+
+    def test_adding_node_moves_few_keys(self):
+        self.cache.set_many(self.data)
+        cache = self.make_cache([*self.nodes, self.start_node()])
+        # About a quarter of the keys now belong to the new node.
+        self.assertGreater(len(cache.get_many(self.data)), 180)
+
+    def test_client_shared_between_threads(self):
+        clients = []
+
+        def worker():
+            cache = self.make_cache(self.nodes)
+            for key, value in list(self.data.items())[:50]:
+                cache.set(key, value)
+                cache.close()
+            clients.append(cache._cache)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(all(client is self.cache._cache for client in clients))
+        # Threads waited for connections rather than opening more.
+        for node in self.nodes:
+            self.assertLessEqual(node.connections, 4)
+
+    def test_failed_node_skipped(self):
+        cache = self.make_cache(self.nodes, ignore_exc=True, retry_timeout=0)
+        cache.set_many(self.data)
+        dead = self.nodes.pop()
+        dead.stop()
+
+        # The dead node is dropped after failing and its keys are misses.
+        for _ in range(3):
+            results = cache.get_many(self.data)
+        self.assertEqual(len(results), 300 - len(dead.data))
+        key = next(
+            key for key in self.data if cache.make_key(key).encode() not in dead.data
+        )
+        cache.set(key, "new")
+        self.assertEqual(cache.get(key), "new")
+
+
+class FlakyCache(LocMemCache):
+    down = threading.Event()
+    calls = 0
+
+    def get(self, *args, **kwargs):
+        FlakyCache.calls += 1
+        if self.down.is_set():
+            raise OSError("Connection refused")
+        return super().get(*args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        if self.down.is_set():
+            raise OSError("Connection refused")
+        return super().set(*args, **kwargs)
+
+
+@override_settings(
+    CACHES={
+        **CACHES,
+        "primary": {"BACKEND": f"{__name__}.FlakyCache", "LOCATION": "primary"},
+        "fallback": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "fallback",
+        },
+    }
+)
+class CircuitBreakerCacheTests(SimpleTestCase):
+    def setUp(self):
+        FlakyCache.down.clear()
+        self.addCleanup(FlakyCache.down.clear)
+        caches["primary"].clear()
+        caches["fallback"].clear()
+        options = {
+            "PRIMARY": "primary",
+            "FALLBACK": "fallback",
+            "FAILURE_THRESHOLD": 2,
+            "PROBE_INTERVAL": 0.01,
+        }
+        self.cache = CircuitBreakerCache(uuid.uuid4().hex, {"OPTIONS": options})
+
+    def test_falls_back_and_recovers(self):
+        self.cache.set("a", 1)
+        self.assertEqual(caches["primary"].get("a"), 1)
+
+        FlakyCache.down.set()
+        # Errors are answered by the fallback until the circuit opens.
+        self.assertIsNone(self.cache.get("a"))
+        self.assertFalse(self.cache.is_open)
+        self.cache.set("b", 2)
+        self.assertTrue(self.cache.is_open)
+
+        # The primary isn't called while the circuit is open.
+        calls = FlakyCache.calls
+        self.assertEqual(self.cache.get("b"), 2)
+        self.assertEqual(FlakyCache.calls, calls)
+
+        FlakyCache.down.clear()
+        deadline = time.monotonic() + 5
+        while self.cache.is_open and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(self.cache.is_open)
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertIsNone(caches["fallback"].get("b"))
+        self.assertEqual(self.cache.stats["opened"], 1)
+        self.assertEqual(self.cache.stats["closed"], 1)
+
+    def test_missing_keys_arent_failures(self):
+        for _ in range(3):
+            with self.assertRaises(ValueError):
+                self.cache.incr("missing")
+        self.assertFalse(self.cache.is_open)
+        self.assertEqual(self.cache.stats["errors"], 0)
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import psycopg2
+from django.db import connection, connections
+from django.test import TestCase
+
+from simple_django.core.db.pool import ConnectionPool, PoolTimeout
+
+
+class ConnectionPoolTests(TestCase):
+    def setUp(self):
+        conn_params = connection.get_connection_params()
+        self.pool = ConnectionPool(
+            lambda: psycopg2.connect(**conn_params),
+            conn_params["dbname"],
+            max_size=2,
+            timeout=0.1,
+        )
+        self.addCleanup(self.pool.close)
+
+    def test_connections_reused(self):
+        first = self.pool.getconn()
+        self.pool.putconn(first)
+        second = self.pool.getconn()
+        self.pool.putconn(second)
+
+        self.assertIs(first, second)
+        stats = self.pool.get_stats()
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["idle"], 1)
+
+    def test_timeout(self):
+        connections = [self.pool.getconn(), self.pool.getconn()]
+        with self.assertRaises(PoolTimeout):
+            self.pool.getconn()
+        self.assertEqual(self.pool.get_stats()["timeouts"], 1)
+        for conn in connections:
+            self.pool.putconn(conn)
+
+    def test_waits_for_returned_connection(self):
+        self.pool.timeout = 5
+        connections = [self.pool.getconn(), self.pool.getconn()]
+        timer = threading.Timer(0.05, self.pool.putconn, [connections[0]])
+        timer.start()
+
+        self.assertIs(self.pool.getconn(), connections[0])
+        timer.join()
+        stats = self.pool.get_stats()
+        self.assertEqual(stats["waits"], 1)
+        self.assertGreater(stats["max_wait_time"], 0)
+        self.assertEqual(stats["in_use"], 2)
+
+    def test_open_transaction_rolled_back(self):
+        conn = self.pool.getconn()
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        self.pool.putconn(conn)
+        self.assertEqual(
+            conn.info.transaction_status, psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        )
+
+    def test_session_state_reset(self):
+        conn = self.pool.getconn()
+        with conn.cursor() as cursor:
+            cursor.execute("SHOW statement_timeout")
+            default = cursor.fetchone()[0]
+            cursor.execute("SET statement_timeout = 1234")
+            cursor.execute("CREATE TEMPORARY TABLE pool_test (id int)")
+        conn.commit()
+        self.pool.putconn(conn)
+
+        conn = self.pool.getconn()
+        with conn.cursor() as cursor:
+            cursor.execute("SHOW statement_timeout")
+            self.assertEqual(cursor.fetchone()[0], default)
+            cursor.execute("SELECT to_regclass('pg_temp.pool_test')")
+            self.assertIsNone(cursor.fetchone()[0])
+        self.pool.putconn(conn)
+
+    def test_broken_connections_discarded(self):
+        self.pool.check_after = 0
+        conn = self.pool.getconn()
+        self.pool.putconn(conn)
+        conn.close()
+
+        new_conn = self.pool.getconn()
+        self.assertIsNot(new_conn, conn)
+        stats = self.pool.get_stats()
+        self.assertEqual(stats["failed_checks"], 1)
+        self.assertEqual(stats["size"], 1)
+
+    def test_idle_connections_closed(self):
+        self.pool.max_idle = 0
+        conn = self.pool.getconn()
+        self.pool.putconn(conn)
+        time.sleep(0.01)
+
+        self.assertIsNot(self.pool.getconn(), conn)
+        self.assertTrue(conn.closed)
+
+
+class PooledBackendTests(TestCase):
+    def test_threads_share_connections(self):
+        pg_connections = []
+
+        def query():
+            with connections["default"].cursor() as cursor:
+                cursor.execute("SELECT 1")
+            pg_connections.append(connections["default"].connection)
+            connections["default"].close()
+
+        for _ in range(2):
+            thread = threading.Thread(target=query)
+            thread.start()
+            thread.join()
+
+        self.assertIs(pg_connections[0], pg_connections[1])
+        self.assertFalse(pg_connections[0].closed)
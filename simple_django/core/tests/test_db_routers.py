@@ -0,0 +1,92 @@
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, router
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from simple_django.accounts.models import User
+from simple_django.core.db import routers
+from simple_django.core.db.middleware import ReplicaRoutingMiddleware
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        routers.clear_lag_checks()
+        self.lag = self.enterContext(
+            mock.patch.object(routers, "get_replica_lag", return_value=0)
+        )
+
+    def test_reads_outside_replica_reads_go_to_primary(self):
+        self.assertEqual(router.db_for_read(User), DEFAULT_DB_ALIAS)
+        with routers.replica_reads(use_replica=False):
+            self.assertEqual(router.db_for_read(User), DEFAULT_DB_ALIAS)
+
+    def test_reads_after_write_go_to_primary(self):
+        with routers.replica_reads():
+            self.assertEqual(router.db_for_read(User), "replica")
+            self.assertEqual(router.db_for_write(User), DEFAULT_DB_ALIAS)
+            self.assertEqual(router.db_for_read(User), DEFAULT_DB_ALIAS)
+
+    def test_lagging_replica_skipped(self):
+        self.lag.return_value = 10
+        with routers.replica_reads():
+            self.assertEqual(router.db_for_read(User), DEFAULT_DB_ALIAS)
+
+        # The result of the check is reused.
+        self.lag.return_value = 0
+        with routers.replica_reads():
+            self.assertEqual(router.db_for_read(User), DEFAULT_DB_ALIAS)
+        self.lag.assert_called_once_with("replica")
+
+        with override_settings(REPLICA_LAG_CHECK_INTERVAL=0):
+            with routers.replica_reads():
+                self.assertEqual(router.db_for_read(User), "replica")
+
+    def test_failing_replica_skipped(self):
+        self.lag.side_effect = DatabaseError
+        with mock.patch.object(routers, "connections") as connections:
+            with routers.replica_reads():
+                self.assertEqual(router.db_for_read(User), DEFAULT_DB_ALIAS)
+        connections["replica"].close.assert_called_once_with()
+
+    def test_no_migrations_on_replicas(self):
+        self.assertFalse(router.allow_migrate("replica", "accounts"))
+        self.assertTrue(router.allow_migrate(DEFAULT_DB_ALIAS, "accounts"))
+
+
+class ReplicaLagTests(TestCase):
+    def test_primary_lag(self):
+        self.assertEqual(routers.get_replica_lag(DEFAULT_DB_ALIAS), 0)
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingMiddlewareTests(TestCase):
+    def setUp(self):
+        routers.clear_lag_checks()
+        self.enterContext(mock.patch.object(routers, "get_replica_lag", return_value=0))
+
+    def get_response(self, request, write=False):
+        def view(request):
+            if write:
+                router.db_for_write(User)
+            return HttpResponse(router.db_for_read(User))
+
+        return ReplicaRoutingMiddleware(view)(request)
+
+    def test_safe_requests_read_from_replica(self):
+        response = self.get_response(RequestFactory().get("/"))
+        self.assertEqual(response.content, b"replica")
+        self.assertNotIn("primary_pin", response.cookies)
+
+        response = self.get_response(RequestFactory().post("/"))
+        self.assertEqual(response.content.decode(), DEFAULT_DB_ALIAS)
+
+    def test_writes_pin_reads_to_primary(self):
+        response = self.get_response(RequestFactory().post("/"), write=True)
+        self.assertEqual(response.cookies["primary_pin"]["max-age"], 5)
+
+        request = RequestFactory().get("/")
+        request.COOKIES["primary_pin"] = "1"
+        response = self.get_response(request)
+        self.assertEqual(response.content.decode(), DEFAULT_DB_ALIAS)
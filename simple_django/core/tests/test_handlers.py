@@ -0,0 +1,102 @@
+import ast
+import inspect
+import json
+import textwrap
+
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.test import AsyncRequestFactory, RequestFactory, TestCase
+from django.urls import reverse
+from faker import Faker
+
+from simple_django.accounts.tests.factories import UserFactory
+from simple_django.core.handlers import APIASGIHandler, APIHandler, APIWSGIHandler
+
+loaded_with = []
+
+
+def record_middleware_setting(get_response):
+    loaded_with.append(list(settings.MIDDLEWARE))
+    return get_response
+
+
+def function_body(function) -> str:
+    """
+    Source of the function's body, without its docstring.
+    """
+    tree = ast.parse(textwrap.dedent(inspect.getsource(function)))
+    body = tree.body[0].body
+    if isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant):
+        body = body[1:]
+    return "\n".join(ast.unparse(statement) for statement in body)
+
+
+class APIHandlerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fake = Faker()
+        cls.user = UserFactory(username=fake.user_name())
+        cls.tokens = cls.user.get_auth_tokens()
+
+    def refresh_token_request(self, rf):
+        return rf.post(
+            reverse("api:accounts:refresh-token"),
+            {"refresh": self.tokens["refresh"]},
+            content_type="application/json",
+        )
+
+    def test_api_requests_skip_site_middleware(self):
+        handler = APIWSGIHandler()
+        request = self.refresh_token_request(RequestFactory())
+        response = handler.get_response(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("access", json.loads(response.content))
+        self.assertFalse(hasattr(request, "session"))
+        self.assertNotIn("X-Frame-Options", response)
+        # Still run.
+        self.assertIn("X-Content-Type-Options", response)
+
+        response = handler.get_response(
+            RequestFactory().get(
+                reverse("api:accounts:user"),
+                HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}",
+            ),
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_settings_left_alone(self):
+        # Other threads may be loading the site's middleware meanwhile.
+        path = f"{__name__}.record_middleware_setting"
+        with self.settings(API_MIDDLEWARE=[path]):
+            APIHandler().load_middleware()
+        self.assertEqual(loaded_with, [settings.MIDDLEWARE])
+
+    def test_load_middleware_matches_django(self):
+        # APIHandler.load_middleware() is a copy, update it along with Django.
+        self.assertEqual(
+            function_body(APIHandler.load_middleware),
+            function_body(BaseHandler.load_middleware).replace(
+                "settings.MIDDLEWARE", "self.get_middleware()"
+            ),
+        )
+
+    def test_site_requests_use_full_middleware(self):
+        middleware = list(settings.MIDDLEWARE)
+        handler = APIWSGIHandler()
+        self.assertEqual(settings.MIDDLEWARE, middleware)
+
+        request = RequestFactory().get("/")
+        response = handler.get_response(request)
+
+        self.assertTrue(hasattr(request, "session"))
+        self.assertIn("X-Frame-Options", response)
+
+    async def test_async_api_requests(self):
+        handler = APIASGIHandler()
+        request = self.refresh_token_request(AsyncRequestFactory())
+        response = await handler.get_response_async(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(hasattr(request, "session"))
+        self.assertNotIn("X-Frame-Options", response)
@@ -1,8 +1,17 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
 from django.contrib.sites.models import Site
 from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
 from faker import Faker
 
+from simple_django.accounts.models import User
+from simple_django.accounts.tests.factories import UserFactory
+
 
 class ManagementCommandsTests(TestCase):
     @classmethod
@@ -33,3 +42,50 @@ class ManagementCommandsTests(TestCase):
             call_command("init_site")
             site = Site.objects.first()
             self.assertEqual(site.domain, f"{domain_name}:3000")
+
+    def test_calibrate_password_hashers(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = Path(tmp_dir) / "password_hashers.json"
+            call_command(
+                "calibrate_password_hashers",
+                target_ms=1,
+                samples=1,
+                output=str(output),
+                stdout=StringIO(),
+                stderr=StringIO(),
+            )
+            parameters = json.loads(output.read_text())
+
+        self.assertEqual(parameters["argon2"]["time_cost"], 2)
+        self.assertEqual(parameters["argon2"]["memory_cost"], 19456)
+        self.assertEqual(parameters["pbkdf2_sha256"]["iterations"], 600_000)
+
+    def test_backfill_primary_email_verified(self):
+        users = [UserFactory(username=self.fake.user_name()) for _ in range(3)]
+        for user in users[:2]:
+            user.email_addresses.primary().set_verified()
+
+        # Simulate rows from before the column existed.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "ALTER TABLE users DISABLE TRIGGER users_sync_primary_email_verified"
+            )
+            cursor.execute("UPDATE users SET primary_email_verified = false")
+            cursor.execute(
+                "ALTER TABLE users ENABLE TRIGGER users_sync_primary_email_verified"
+            )
+        self.assertFalse(User.objects.filter(primary_email_verified=True).exists())
+
+        call_command("backfill_primary_email_verified", chunk_size=1, stdout=StringIO())
+
+        self.assertEqual(
+            set(User.objects.filter(primary_email_verified=True)), set(users[:2])
+        )
+
+    def test_email_outbox_stats(self):
+        UserFactory(username=self.fake.user_name())
+        out = StringIO()
+        call_command("email_outbox_stats", stdout=out)
+        stats = json.loads(out.getvalue())
+        self.assertEqual(stats["pending"], 1)
+        self.assertEqual(stats["due"], 1)
@@ -0,0 +1,160 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.admin import site
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from faker import Faker
+from rest_framework.test import APIClient, APITestCase
+
+from simple_django.accounts.models import EmailAddress, User
+from simple_django.accounts.tests.factories import UserFactory
+from simple_django.core.pagination import EstimatedCountPaginator
+from simple_django.core.templatetags.pagination_tags import (
+    ELLIPSIS,
+    get_elided_page_range,
+)
+
+
+class KeysetPaginationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        # Pairs of users joined at the same time, to page through ties.
+        User.objects.bulk_create(
+            User(
+                username=f"user{i}",
+                email=f"user{i}@example.com",
+                date_joined=now - timedelta(minutes=i // 2),
+            )
+            for i in range(25)
+        )
+        cls.admin = UserFactory(
+            username="admin", is_staff=True, date_joined=now - timedelta(days=1)
+        )
+        cls.expected = list(User.objects.order_by("-date_joined", "-id"))
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def get_page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_pages_forwards_and_backwards(self):
+        url = reverse("api:accounts:users") + "?page_size=10"
+        pages = []
+        while url:
+            # One SELECT, within the request's savepoint.
+            with self.assertNumQueries(3):
+                page = self.get_page(url)
+            pages.append(page)
+            url = page["next"]
+
+        self.assertEqual([len(page["results"]) for page in pages], [10, 10, 6])
+        self.assertIsNone(pages[0]["previous"])
+        usernames = [user["username"] for page in pages for user in page["results"]]
+        self.assertEqual(usernames, [user.username for user in self.expected])
+
+        page = self.get_page(pages[-1]["previous"])
+        self.assertEqual(page["results"], pages[1]["results"])
+        page = self.get_page(page["previous"])
+        self.assertEqual(page["results"], pages[0]["results"])
+        self.assertIsNone(page["previous"])
+        self.assertEqual(page["next"], pages[0]["next"])
+
+    def test_invalid_cursor(self):
+        for cursor in ["x", "eyJwIjogWzFdfQ=="]:
+            response = self.client.get(
+                reverse("api:accounts:users"), {"cursor": cursor}
+            )
+            self.assertEqual(response.status_code, 404)
+
+    def test_admins_only(self):
+        self.client.force_authenticate(self.expected[0])
+        response = self.client.get(reverse("api:accounts:users"))
+        self.assertEqual(response.status_code, 403)
+
+
+class EmailAddressListTests(APITestCase):
+    def test_lists_own_addresses(self):
+        fake = Faker()
+        user = UserFactory(username=fake.user_name())
+        UserFactory(username=fake.user_name())
+        EmailAddress.objects.create(user=user, email=fake.email())
+
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {user.get_auth_tokens()['access']}"
+        )
+        response = client.get(reverse("api:accounts:emailaddress-list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {address["email"] for address in response.data["results"]},
+            set(user.email_addresses.values_list("email", flat=True)),
+        )
+        self.assertIsNone(response.data["next"])
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(User(username=f"user{i}") for i in range(5))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_small_counts_cached(self):
+        paginator = EstimatedCountPaginator(User.objects.order_by("id"), 2)
+        # Statistics are shared with other tests, e.g. ANALYZEs of many rows.
+        with mock.patch.object(paginator, "get_estimated_count", return_value=5):
+            self.assertEqual(paginator.num_pages, 3)
+        self.assertFalse(paginator.estimated)
+
+        with self.assertNumQueries(0):
+            paginator = EstimatedCountPaginator(User.objects.order_by("id"), 2)
+            self.assertEqual(paginator.count, 5)
+
+    @override_settings(PAGINATOR_ESTIMATE_THRESHOLD=0)
+    def test_estimates(self):
+        queryset = User.objects.filter(username__startswith="user").order_by("id")
+        paginator = EstimatedCountPaginator(queryset, 2)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertGreaterEqual(paginator.count, 0)
+        self.assertTrue(paginator.estimated)
+        self.assertTrue(queries[0]["sql"].startswith("EXPLAIN"))
+
+        paginator = EstimatedCountPaginator(User.objects.order_by("id"), 2)
+        with CaptureQueriesContext(connection) as queries:
+            paginator.count
+        self.assertNotIn("COUNT(", queries[-1]["sql"])
+
+    @override_settings(PAGINATOR_ESTIMATE_THRESHOLD=0)
+    def test_pages_past_estimate(self):
+        paginator = EstimatedCountPaginator(User.objects.order_by("id"), 1)
+        with mock.patch.object(paginator, "get_estimated_count", return_value=2):
+            self.assertEqual(paginator.num_pages, 2)
+        self.assertEqual(paginator.page(5).object_list[0].username, "user4")
+        self.assertEqual(len(paginator.page(6)), 0)
+
+    @override_settings(PAGINATOR_ESTIMATE_THRESHOLD=0)
+    def test_elided_page_range(self):
+        paginator = EstimatedCountPaginator(User.objects.order_by("id"), 1)
+        with mock.patch.object(paginator, "get_estimated_count", return_value=50):
+            page_range = list(get_elided_page_range(1, paginator))
+        self.assertEqual(page_range, [1, 2, 3, 4, ELLIPSIS, 49, 50])
+
+    @override_settings(PAGINATOR_ESTIMATE_THRESHOLD=0)
+    def test_admin_changelist(self):
+        request = RequestFactory().get(reverse("admin:accounts_user_changelist"))
+        request.user = UserFactory(username="admin", is_staff=True, is_superuser=True)
+        with CaptureQueriesContext(connection) as queries:
+            changelist = site._registry[User].get_changelist_instance(request)
+        self.assertTrue(changelist.paginator.estimated)
+        self.assertEqual(len(changelist.result_list), 6)
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries))